@@ -1,84 +1,441 @@
-from flask import Flask, render_template, request, jsonify
-import firebase_admin
-from firebase_admin import credentials, firestore
-import google.generativeai as genai
-from google.cloud import texttospeech
+from flask import Blueprint, Flask, Response, g, request, jsonify, send_file, stream_with_context, url_for
+import hashlib
 import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
 import json
 from dotenv import load_dotenv
+from clients import ProcessLocal, firestore_db, story_service, tts_client
+import metrics
+import mp3
+from story_cache import GeneratedStoryCache, adult_story_key, child_story_key
+from story_catalog import StoryCatalog
+from audio_manifest import AudioManifest
+from static_assets import FINGERPRINTED, AssetManifest, PageCache, send_static
+from text_segments import TextSegmenter, pack_story
+from upstream_limits import UpstreamBusy, UpstreamLimiter
+from tts_cache import TTSCache, cache_key
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+# Firebase, Gemini and TTS clients are created per process on first use (see
+# clients.py), so a new worker can serve pages before any of them exist.
+main = Blueprint('main', __name__)
 
-# Initialize Firebase
-firebase_key_path = os.environ.get('FIREBASE_KEY_PATH', 'firebase-key.json')
-if not os.path.exists(firebase_key_path):
-    print(f"Warning: Firebase key file {firebase_key_path} not found. Please ensure it exists.")
-    firebase_key_path = 'firebase-key.json'  # fallback
+# Optionally reuse generated stories for identical requests (name swapped in at serve time)
+story_cache = None
+if os.environ.get('STORY_RESPONSE_CACHE', '').lower() in ('1', 'true', 'yes'):
+    story_cache = GeneratedStoryCache(
+        variants=int(os.environ.get('STORY_RESPONSE_CACHE_VARIANTS', '3')),
+        ttl=int(os.environ.get('STORY_RESPONSE_CACHE_TTL', str(24 * 60 * 60))),
+        max_keys=int(os.environ.get('STORY_RESPONSE_CACHE_MAX_KEYS', '1000'))
+    )
 
-cred = credentials.Certificate(firebase_key_path)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Limit concurrent calls per upstream so one slow service can't tie up every
+# worker thread; callers that can't get a slot receive a 429
+upstream_wait = float(os.environ.get('UPSTREAM_QUEUE_TIMEOUT', '2'))
+upstream_retry_after = int(os.environ.get('UPSTREAM_RETRY_AFTER', '5'))
+gemini_limiter = UpstreamLimiter(
+    'Gemini', int(os.environ.get('GEMINI_CONCURRENCY', '4')), upstream_wait, upstream_retry_after, 'gemini'
+)
+tts_limiter = UpstreamLimiter(
+    'Text-to-speech', int(os.environ.get('TTS_CONCURRENCY', '8')), upstream_wait, upstream_retry_after, 'tts'
+)
+firestore_limiter = UpstreamLimiter(
+    'Firestore', int(os.environ.get('FIRESTORE_CONCURRENCY', '8')), upstream_wait, upstream_retry_after, 'firestore'
+)
 
-# Configure Gemini API
-gemini_api_key = os.environ.get('GEMINI_API_KEY')
-if not gemini_api_key or gemini_api_key == 'your_gemini_api_key_here':
-    print("Warning: GEMINI_API_KEY not set. Story generation will not work.")
-genai.configure(api_key=gemini_api_key or 'dummy-key')
+# Synthesized audio is cached on disk so repeated text isn't re-synthesized
+tts_cache = TTSCache(
+    os.environ.get('TTS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'lullabai-tts')),
+    max_bytes=int(os.environ.get('TTS_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+)
 
-# Configure Google Cloud TTS
-tts_key_path = os.environ.get('TTS_KEY_PATH', 'tts-key.json')
-if tts_key_path and os.path.exists(tts_key_path):
-    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = tts_key_path
-else:
-    print(f"Warning: TTS key file {tts_key_path} not found. Text-to-speech will not work.")
+# Worker pool for synthesizing narration while a story is still being generated
+tts_pipeline_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('TTS_PIPELINE_WORKERS', '4')),
+    thread_name_prefix='tts-pipeline'
+)
 
-tts_client = texttospeech.TextToSpeechClient()
+# Whole-story synthesis packs text into inputs just under the 5000-byte TTS limit
+tts_batch_max_bytes = int(os.environ.get('TTS_BATCH_MAX_BYTES', '4500'))
+tts_batch_max_chars = int(os.environ.get('TTS_BATCH_MAX_CHARS', '20000'))
+# The batch shares the pipeline pool with narration, so don't wait on it forever
+tts_batch_timeout = float(os.environ.get('TTS_BATCH_TIMEOUT', '60'))
 
-@app.route('/')
+# Cache the classic story catalog in memory and keep it fresh with a listener
+story_catalog = ProcessLocal(lambda: StoryCatalog(
+    firestore_db.get(),
+    ttl=int(os.environ.get('STORY_CACHE_TTL', '300')),
+    max_size=int(os.environ.get('STORY_CACHE_MAX_SIZE', '500')),
+    limiter=firestore_limiter
+))
+
+static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Pre-rendered classic story audio (see prerender_audio.py)
+audio_manifest = AudioManifest(os.path.join(static_folder, 'audio'))
+
+# Fingerprinted, precompressed copies of static files (see build_assets.py)
+asset_manifest = AssetManifest(os.path.join(static_folder, 'dist', 'assets.json'))
+
+# The HTML pages are the same for everyone, so render each one once per process
+# (and again after a new asset build, so they link to the new files)
+page_cache = PageCache(version=asset_manifest.version)
+
+def warm_caches():
+    """Load the story catalog ahead of the first request that needs it"""
+    try:
+        story_catalog.get().warm()
+    except Exception as e:
+        print(f"Warning: could not warm story catalog: {e}")
+
+def fingerprinted_static(endpoint, values):
+    """Point url_for('static', filename=...) at the fingerprinted copy when there is one"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = asset_manifest.lookup(values['filename']) or values['filename']
+
+def static_file(filename):
+    """Serve static files; fingerprinted and versioned (?v=) ones are cached for good"""
+    immutable = bool(FINGERPRINTED.match(filename)) or 'v' in request.args
+    return send_static(static_folder, filename, immutable)
+
+def create_app():
+    """Build the Flask app. Cheap: no upstream clients are created here."""
+    app = Flask(__name__, static_folder=None)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    app.add_url_rule('/static/<path:filename>', endpoint='static', view_func=static_file)
+    app.url_defaults(fingerprinted_static)
+    app.register_blueprint(main)
+    return app
+
+@main.app_errorhandler(UpstreamBusy)
+def upstream_busy(e):
+    """Ask the client to back off when an upstream is at its concurrency limit"""
+    return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+
+@main.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.upstream_seconds = {}
+    metrics.HTTP_IN_FLIGHT.inc()
+
+@main.after_app_request
+def record_response(response):
+    g.response_status = response.status_code
+    if response.content_length is not None:
+        g.response_bytes = response.content_length
+    return response
+
+def current_route():
+    """URL rule of the current request, used as the route label in metrics"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def record_error(message, error):
+    """Count an error a route handled itself and log it (as JSON when LOG_FORMAT=json)"""
+    route = current_route()
+    metrics.HTTP_ERRORS.inc(route=route, error=type(error).__name__)
+    if metrics.JSON_LOGS:
+        metrics.log_event('error', route=route, error=type(error).__name__, message=f"{message}: {error}")
+    else:
+        print(f"{message}: {str(error)}")
+
+@main.teardown_app_request
+def record_request(error):
+    """Count and time the request once its body has been sent (streams included)"""
+    if 'request_start' not in g:
+        return
+    duration = time.perf_counter() - g.request_start
+    route = current_route()
+    status = g.get('response_status', 500)
+    metrics.HTTP_IN_FLIGHT.dec()
+    metrics.HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
+    metrics.HTTP_SECONDS.observe(duration, method=request.method, route=route)
+    if 'response_bytes' in g:
+        metrics.HTTP_RESPONSE_BYTES.inc(g.response_bytes, route=route)
+    if error is not None:
+        metrics.HTTP_ERRORS.inc(route=route, error=type(error).__name__)
+    metrics.log_event(
+        'request', method=request.method, path=request.path, route=route, status=status,
+        duration_ms=round(duration * 1000, 1), bytes=g.get('response_bytes'),
+        upstream_ms={name: round(seconds * 1000, 1) for name, seconds in g.upstream_seconds.items()},
+        error=type(error).__name__ if error is not None else None
+    )
+
+@main.route('/metrics')
+def prometheus_metrics():
+    """Request, upstream and payload metrics for this worker in the Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def timing_summary(timing):
+    """Milliseconds spent in Gemini vs our own code for the current request"""
+    total = time.perf_counter() - g.request_start
+    summary = {
+        'gemini_ms': round(timing['upstream'] * 1000, 1),
+        'app_ms': round((total - timing['upstream']) * 1000, 1),
+        'total_ms': round(total * 1000, 1)
+    }
+    if 'first_chunk' in timing:
+        summary['first_chunk_ms'] = round(timing['first_chunk'] * 1000, 1)
+    if timing.get('cached'):
+        summary['cached'] = True
+    return summary
+
+def server_timing(timing):
+    """Server-Timing header value, shown in the browser's network panel"""
+    summary = timing_summary(timing)
+    return f"gemini;dur={summary['gemini_ms']}, app;dur={summary['app_ms']}, total;dur={summary['total_ms']}"
+
+@main.route('/')
 def index():
     """Main page - choose bedtime story option"""
-    return render_template('index.html')
+    return page_cache.response('index.html')
 
-@app.route('/classic')
+@main.route('/classic')
 def classic():
     """Classic stories page"""
-    return render_template('classic.html')
+    return page_cache.response('classic.html')
 
-@app.route('/personalised')
+@main.route('/personalised')
 def personalised():
     """Personalised story generation page"""
-    return render_template('personalised.html')
+    return page_cache.response('personalised.html')
 
-@app.route('/adult')
+@main.route('/adult')
 def adult():
     """Adult bedtime stories page"""
-    return render_template('adult.html')
+    return page_cache.response('adult.html')
+
+def with_audio_url(story):
+    """Copy of a classic story with the URL of its pre-rendered audio, if there is any"""
+    story = dict(story)
+    entry = audio_manifest.entry(story.get('id'))
+    if entry:
+        # The content hash in the query string lets browsers cache the file until it is re-rendered
+        story['audio_url'] = url_for('static', filename=f"audio/{entry['file']}", v=entry['sha256'][:12])
+        story['audio_duration'] = entry['duration']
+    elif os.path.exists(os.path.join(audio_manifest.directory, f"classic_{story.get('id')}.mp3")):
+        # Rendered before the manifest existed
+        story['audio_url'] = url_for('static', filename=f"audio/classic_{story['id']}.mp3")
+    return story
 
-@app.route('/api/stories')
+@main.route('/api/stories')
 def get_stories():
-    """Fetch classic stories from Firebase (exclude generated stories)"""
+    """Fetch classic stories from the cached catalog (exclude generated stories)"""
     try:
-        stories_ref = db.collection('stories')
-        stories = []
-        for doc in stories_ref.stream():
-            story_data = doc.to_dict()
-            # Only include classic stories, exclude generated ones
-            if story_data.get('type') != 'generated':
-                story_data['id'] = doc.id
-                stories.append(story_data)
-        return jsonify(stories)
+        return jsonify([with_audio_url(story) for story in story_catalog.get().list_stories()])
+    except UpstreamBusy:
+        raise
     except Exception as e:
+        record_error("Error fetching stories", e)
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/generate-story', methods=['POST'])
-def generate_story():
-    """Generate story using Gemini API"""
+def generate_story_text(prompt, cache_key, name):
+    """Generate a story with Gemini, through the response cache when it is enabled.
+
+    Returns (story_text, timing). Identical concurrent requests share one
+    Gemini call; timing['cached'] is set when no call was made for this one.
+    """
+    timing = {'upstream': 0.0, 'cached': True}
+    
+    def generate():
+        with gemini_limiter.slot():
+            story_text, call_timing = story_service.get().generate(prompt)
+        timing.update(call_timing, cached=False)
+        return story_text
+    
+    if cache_key is None:
+        return generate(), timing
+    return story_cache.get_or_generate(cache_key, name, generate), timing
+
+def wants_event_stream():
+    """Whether the client asked for a Server-Sent Events response"""
+    return request.args.get('stream') == '1' or 'text/event-stream' in request.headers.get('Accept', '')
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def gemini_stream(prompt, timing, release):
+    """Stream a story from Gemini, giving back its Gemini slot as soon as generation ends"""
+    try:
+        yield from story_service.get().stream(prompt, timing)
+    finally:
+        release()
+
+def story_text_source(prompt, cache_key, name):
+    """Where a streamed story comes from: the response cache, another request, or Gemini.
+
+    Returns (texts, timing, on_close). texts yields the story text and timing
+    is filled in as it streams (timing['cached'] is set when this request
+    makes no Gemini call). With the response cache on, identical concurrent
+    misses share one Gemini stream: the first request streams it and stores
+    the story, and the others wait for it and replay it as a single chunk.
+    on_close, if given, must be called when the response is closed.
+
+    A request that calls Gemini takes a Gemini slot here, so a busy upstream
+    is reported as a 429 before any events are sent. The slot is given back
+    when generation ends, not when the response (and any narration) does.
+    """
+    timing = {}
+    if cache_key is None:
+        release = gemini_limiter.hold()
+        return gemini_stream(prompt, timing, release), timing, release
+
+    story, flight, leader = story_cache.join(cache_key, name)
+    if story is not None:
+        return [story], {'upstream': 0.0, 'cached': True}, None
+
+    if not leader:
+        timing.update(upstream=0.0, cached=True)
+
+        def follow():
+            story = flight.wait(name)
+            if story is not None:
+                yield story
+                return
+            # The leader's story couldn't be shared, so generate one for this reader
+            timing['cached'] = False
+            yield from gemini_stream(prompt, timing, gemini_limiter.hold())
+
+        return follow(), timing, None
+
+    try:
+        release = gemini_limiter.hold()
+    except UpstreamBusy:
+        flight.land(name, None)
+        raise
+
+    def lead():
+        parts = []
+        try:
+            for text in gemini_stream(prompt, timing, release):
+                parts.append(text)
+                yield text
+        except Exception as e:
+            flight.fail(e)
+            raise
+        flight.land(name, ''.join(parts))
+
+    def on_close():
+        release()
+        # If the stream was abandoned (or never started), let the followers generate their own
+        flight.land(name, None)
+
+    return lead(), timing, on_close
+
+def event_stream_response(events, on_close=None):
+    """Wrap an event generator in a text/event-stream response"""
+    response = Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    if on_close is not None:
+        response.call_on_close(on_close)
+    return response
+
+def stream_story(prompt, build_story, log_prefix, cache_key=None, name=None):
+    """Stream a generated story as Server-Sent Events.
+
+    Sends a 'chunk' event for each piece of text as Gemini produces it, then a
+    'story' event with the full story object (the same shape as the JSON
+    response) and a 'timing' event, or an 'error' event if generation fails.
+    A story from the response cache is sent as a single chunk.
+    """
+    texts, timing, on_close = story_text_source(prompt, cache_key, name)
+    
+    def generate():
+        try:
+            parts = []
+            for text in texts:
+                parts.append(text)
+                yield sse_event('chunk', {'text': text})
+            
+            if not parts:
+                yield sse_event('error', {'error': 'No story generated. Please try again.'})
+                return
+            
+            story_text = ''.join(parts)
+            yield sse_event('story', build_story(story_text))
+            yield sse_event('timing', timing_summary(timing))
+        except Exception as e:
+            record_error(log_prefix, e)
+            yield sse_event('error', {'error': f'Story generation failed: {str(e)}'})
+    
+    return event_stream_response(generate(), on_close=on_close)
+
+def stream_narrated_story(prompt, build_story, log_prefix, cache_key=None, name=None):
+    """Stream a generated story together with its narration as Server-Sent Events.
+
+    Text is split into segments as Gemini produces it, and each segment is
+    synthesized on the TTS worker pool while generation continues. Besides the
+    'chunk', 'story' and 'timing' events of stream_story(), 'segment' events deliver
+    audio URLs in reading order and a final 'done' event gives the count.
+    """
+    texts, timing, on_close = story_text_source(prompt, cache_key, name)
+    
+    def generate():
+        segmenter = TextSegmenter(
+            max_chars=int(os.environ.get('TTS_SEGMENT_MAX_CHARS', '800')),
+            first_chars=int(os.environ.get('TTS_FIRST_SEGMENT_CHARS', '200'))
+        )
+        pending = deque()
+        sent = 0
+
+        def submit(segments):
+            for segment in segments:
+                pending.append((segment, tts_pipeline_pool.submit(synthesize_speech, segment, -1)))
+
+        def ready_segments(wait=False):
+            nonlocal sent
+            # Only release audio in order, so the client can play it as it arrives
+            while pending and (wait or pending[0][1].done()):
+                segment, future = pending.popleft()
+                key = future.result()
+                yield sse_event('segment', {
+                    'index': sent,
+                    'text': segment,
+                    'audio_url': url_for('main.tts_audio', key=key)
+                })
+                sent += 1
+
+        try:
+            parts = []
+            for text in texts:
+                parts.append(text)
+                yield sse_event('chunk', {'text': text})
+                submit(segmenter.feed(text))
+                yield from ready_segments()
+            
+            if not parts:
+                yield sse_event('error', {'error': 'No story generated. Please try again.'})
+                return
+            
+            submit(segmenter.flush())
+            story_text = ''.join(parts)
+            yield sse_event('story', build_story(story_text))
+            yield from ready_segments(wait=True)
+            yield sse_event('timing', timing_summary(timing))
+            yield sse_event('done', {'segments': sent})
+        except Exception as e:
+            record_error(log_prefix, e)
+            yield sse_event('error', {'error': f'Story generation failed: {str(e)}'})
+        finally:
+            # Client went away or generation failed - skip audio nobody will hear
+            for _, future in pending:
+                future.cancel()
+    
+    return event_stream_response(generate(), on_close=on_close)
+
+@main.route('/api/generate-story', methods=['POST'], defaults={'narrated': False})
+@main.route('/api/generate-story/narrated', methods=['POST'], defaults={'narrated': True})
+def generate_story(narrated):
+    """Generate story using Gemini API (with streamed narration on /narrated)"""
     try:
         data = request.get_json()
         keywords = data.get('keywords', [])
@@ -91,129 +448,241 @@ def generate_story():
             return jsonify({'error': 'Child name is required'}), 400
         
         # Check if Gemini API key is configured
-        gemini_api_key = os.environ.get('GEMINI_API_KEY')
-        if not gemini_api_key or gemini_api_key == 'your_gemini_api_key_here':
+        if not story_service.get().configured:
             return jsonify({'error': 'Gemini API key not configured. Please set GEMINI_API_KEY in your .env file.'}), 500
         
         # Create prompt for Gemini
-        prompt = f"""Write a gentle, soothing bedtime story for children aged 3-8 years old. 
-        The main character should be a child named {child_name}.
-        The story should include these keywords: {', '.join(keywords)}.
-        
-        Requirements:
-        - Keep it under 500 words
-        - Use simple, comforting language
-        - Include a positive message or lesson
-        - Make it suitable for bedtime reading
-        - Avoid scary or violent content
-        - Make {child_name} the hero of the story
-        - Use {child_name}'s name naturally throughout the story
-        
-        Please write the story in a warm, narrative style."""
+        prompt = story_service.get().child_prompt(keywords, child_name)
+        cache_key = child_story_key(keywords) if story_cache is not None else None
+        
+        def build_story(story_text):
+            # Create story object (temporary, not saved to Firebase)
+            return {
+                'title': f"{child_name}'s Story with {', '.join(keywords)}",
+                'content': story_text,
+                'keywords': keywords,
+                'child_name': child_name,
+                'timestamp': datetime.now().isoformat(),
+                'type': 'generated',
+                'temporary': True  # Mark as temporary
+            }
+        
+        if narrated:
+            return stream_narrated_story(prompt, build_story, 'Error generating story', cache_key, child_name)
+        
+        if wants_event_stream():
+            return stream_story(prompt, build_story, 'Error generating story', cache_key, child_name)
         
         # Generate story using Gemini
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
+        story_text, timing = generate_story_text(prompt, cache_key, child_name)
         
-        if not response.text:
+        if not story_text:
             return jsonify({'error': 'No story generated. Please try again.'}), 500
-            
-        story_text = response.text
-        
-        # Create story object (temporary, not saved to Firebase)
-        story_data = {
-            'title': f"{child_name}'s Story with {', '.join(keywords)}",
-            'content': story_text,
-            'keywords': keywords,
-            'child_name': child_name,
-            'timestamp': datetime.now().isoformat(),
-            'type': 'generated',
-            'temporary': True  # Mark as temporary
-        }
         
         # Don't save to Firebase - return the story directly
-        return jsonify(story_data)
+        return jsonify(build_story(story_text)), {'Server-Timing': server_timing(timing)}
         
+    except UpstreamBusy:
+        raise
     except Exception as e:
-        print(f"Error generating story: {str(e)}")
+        record_error("Error generating story", e)
         return jsonify({'error': f'Story generation failed: {str(e)}'}), 500
 
-@app.route('/api/story/<story_id>')
+@main.route('/api/story/<story_id>')
 def get_story(story_id):
     """Get specific story by ID"""
     try:
-        story_doc = db.collection('stories').document(story_id).get()
-        if story_doc.exists:
-            story_data = story_doc.to_dict()
-            story_data['id'] = story_id
-            return jsonify(story_data)
+        story_data = story_catalog.get().get_story(story_id)
+        if story_data is not None:
+            return jsonify(with_audio_url(story_data))
         else:
             return jsonify({'error': 'Story not found'}), 404
+    except UpstreamBusy:
+        raise
     except Exception as e:
+        record_error("Error fetching story", e)
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/test-gemini')
+@main.route('/api/cache-stats')
+def cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    stats = {'tts': tts_cache.stats()}
+    if story_catalog.ready:
+        stats['stories'] = story_catalog.get().stats()
+    if story_cache is not None:
+        stats['generated'] = story_cache.stats()
+    return jsonify(stats)
+
+@main.route('/api/test-gemini')
 def test_gemini():
     """Test Gemini API connection"""
     try:
-        gemini_api_key = os.environ.get('GEMINI_API_KEY')
-        if not gemini_api_key or gemini_api_key == 'your_gemini_api_key_here':
+        if not story_service.get().configured:
             return jsonify({'error': 'Gemini API key not configured'}), 500
         
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content("Say 'Hello, Gemini is working!'")
+        with gemini_limiter.slot():
+            message, timing = story_service.get().generate("Say 'Hello, Gemini is working!'")
         
-        if response.text:
-            return jsonify({'success': True, 'message': response.text})
+        if message:
+            return jsonify({'success': True, 'message': message}), {'Server-Timing': server_timing(timing)}
         else:
             return jsonify({'error': 'No response from Gemini'}), 500
             
+    except UpstreamBusy:
+        raise
     except Exception as e:
-        print(f"Gemini test error: {str(e)}")
+        record_error("Gemini test error", e)
         return jsonify({'error': f'Gemini test failed: {str(e)}'}), 500
 
-@app.route('/api/tts', methods=['POST'])
+def synthesize_speech(text, wait=None, ssml=False):
+    """Make sure audio for text (or an SSML document) is in the TTS cache and return its cache key"""
+    from speech import AUDIO_CONFIG, VOICE, synthesis_input  # the TTS library is loaded on first use
+
+    key = cache_key(text, VOICE, AUDIO_CONFIG, ssml)
+    if tts_cache.lookup(key) is None:
+        with tts_limiter.slot(wait), metrics.track_upstream('tts', 'synthesize_speech'):
+            response = tts_client.get().synthesize_speech(
+                input=synthesis_input(text, ssml), voice=VOICE, audio_config=AUDIO_CONFIG
+            )
+        metrics.count_bytes('tts', sent=len(text.encode('utf-8')), received=len(response.audio_content))
+        tts_cache.put(key, response.audio_content)
+    return key
+
+def send_tts_audio(key):
+    """Stream cached audio from disk with Range, ETag and long-lived cache headers"""
+    response = send_file(
+        tts_cache.path(key),
+        mimetype='audio/mpeg',
+        conditional=True,
+        etag=key,
+        max_age=31536000
+    )
+    # Audio is content-addressed, so a URL never changes meaning
+    response.cache_control.immutable = True
+    if response.content_length:
+        tts_cache.record_served(response.content_length)
+    return response
+
+@main.route('/api/tts', methods=['POST'])
 def text_to_speech():
-    """Convert text to speech using Google Cloud TTS and return as base64 blob URL"""
+    """Convert text to speech using Google Cloud TTS.
+
+    The 'response' field picks the format: 'url' returns a URL for the cached
+    audio, 'audio' returns audio/mpeg directly, and the default returns a
+    base64 data URL.
+    """
     try:
         data = request.get_json()
         text = data.get('text', '')
+        response_mode = data.get('response', 'data_url')
         
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        # Configure TTS request
-        synthesis_input = texttospeech.SynthesisInput(text=text)
-        
-        # Configure voice
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="en-US",
-            name="en-US-Chirp3-HD-Laomedeia"
-        )
+        key = synthesize_speech(text)
         
-        # Configure audio
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3
-        )
+        if response_mode == 'url':
+            return jsonify({'audio_url': url_for('main.tts_audio', key=key)})
         
-        # Perform TTS
-        response = tts_client.synthesize_speech(
-            input=synthesis_input, voice=voice, audio_config=audio_config
-        )
+        if response_mode == 'audio':
+            return send_tts_audio(key)
         
         # Convert audio content to base64 and create blob URL
         import base64
-        audio_base64 = base64.b64encode(response.audio_content).decode('utf-8')
+        with open(tts_cache.path(key), 'rb') as f:
+            audio = f.read()
+        tts_cache.record_served(len(audio))
+        audio_base64 = base64.b64encode(audio).decode('utf-8')
         blob_url = f"data:audio/mp3;base64,{audio_base64}"
         
         return jsonify({'audio_url': blob_url})
         
+    except UpstreamBusy:
+        raise
     except Exception as e:
+        record_error("TTS error", e)
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/generate-adult-story', methods=['POST'])
-def generate_adult_story():
-    """Generate therapeutic adult bedtime story using Gemini API"""
+def concatenate_audio(keys):
+    """Join cached segments into one cached MP3 and return its key"""
+    key = hashlib.sha256(' '.join(keys).encode('utf-8')).hexdigest()
+    if not tts_cache.contains(key):
+        parts = []
+        for segment_key in keys:
+            with open(tts_cache.path(segment_key), 'rb') as f:
+                parts.append(f.read())
+        tts_cache.put(key, mp3.concatenate(parts))
+    return key
+
+@main.route('/api/tts/batch', methods=['POST'])
+def text_to_speech_batch():
+    """Synthesize a whole story with as few TTS calls as possible.
+
+    Sentences are packed into segments close to the TTS input limit (SSML
+    with pauses between paragraphs when the voice supports it) and the
+    segments are synthesized concurrently. The 'response' field picks the
+    format: the default 'segments' returns the ordered segment URLs, 'url'
+    returns a URL for the whole story as one MP3, and 'audio' returns that
+    MP3 directly.
+    """
+    from speech import supports_ssml
+
+    try:
+        data = request.get_json()
+        text = data.get('text', '')
+        response_mode = data.get('response', 'segments')
+
+        if not text.strip():
+            return jsonify({'error': 'No text provided'}), 400
+        if len(text) > tts_batch_max_chars:
+            return jsonify({'error': f'Text is longer than {tts_batch_max_chars} characters'}), 400
+
+        ssml = supports_ssml()
+        segments = pack_story(text, max_bytes=tts_batch_max_bytes, ssml=ssml)
+        if not segments:
+            return jsonify({'error': 'No text provided'}), 400
+        futures = [tts_pipeline_pool.submit(synthesize_speech, segment, None, ssml) for segment in segments]
+        deadline = time.monotonic() + tts_batch_timeout
+        try:
+            keys = [future.result(timeout=max(0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeout:
+            # The pool is saturated (or TTS is very slow): ask the client to retry later
+            raise UpstreamBusy(tts_limiter.name, tts_limiter.retry_after) from None
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if response_mode in ('url', 'audio'):
+            key = concatenate_audio(keys)
+            if response_mode == 'url':
+                return jsonify({'audio_url': url_for('main.tts_audio', key=key), 'segments': len(keys)})
+            return send_tts_audio(key)
+
+        return jsonify({'segments': [
+            {'index': index, 'audio_url': url_for('main.tts_audio', key=key)}
+            for index, key in enumerate(keys)
+        ]})
+
+    except UpstreamBusy:
+        raise
+    except Exception as e:
+        record_error("Batch TTS error", e)
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/api/tts/audio/<key>.mp3')
+def tts_audio(key):
+    """Serve previously synthesized audio by cache key"""
+    if len(key) != 64 or any(c not in '0123456789abcdef' for c in key):
+        return jsonify({'error': 'Audio not found'}), 404
+    # Fetching a URL handed out earlier isn't a synthesis lookup, so it doesn't count as a cache hit
+    if not tts_cache.contains(key):
+        return jsonify({'error': 'Audio not found'}), 404
+    return send_tts_audio(key)
+
+@main.route('/api/generate-adult-story', methods=['POST'], defaults={'narrated': False})
+@main.route('/api/generate-adult-story/narrated', methods=['POST'], defaults={'narrated': True})
+def generate_adult_story(narrated):
+    """Generate therapeutic adult bedtime story using Gemini API (with streamed narration on /narrated)"""
     try:
         data = request.get_json()
         sleep_issue = data.get('sleepIssue', '')
@@ -229,8 +698,7 @@ def generate_adult_story():
             return jsonify({'error': 'Adult name is required'}), 400
         
         # Check if Gemini API key is configured
-        gemini_api_key = os.environ.get('GEMINI_API_KEY')
-        if not gemini_api_key or gemini_api_key == 'your_gemini_api_key_here':
+        if not story_service.get().configured:
             return jsonify({'error': 'Gemini API key not configured. Please set GEMINI_API_KEY in your .env file.'}), 500
         
         # Determine the sleep issue to use
@@ -238,65 +706,54 @@ def generate_adult_story():
         sleep_issue_display = custom_sleep_reason if custom_sleep_reason else sleep_issue.replace('_', ' ').title()
         
         # Create therapeutic prompt for Gemini
-        memory_text = ""
-        if memories:
-            memory_text += f" including these nostalgic elements: {', '.join(memories)}"
-        if custom_memory:
-            memory_text += f" and incorporate this personal memory: '{custom_memory}'"
-        
-        prompt = f"""Write a gentle, therapeutic bedtime story for an adult named {adult_name} who is struggling with: {final_sleep_issue}.
-        
-        Requirements:
-        - Keep it under 600 words
-        - Use soothing, calming language
-        - Include therapeutic elements that specifically address: {final_sleep_issue}
-        - Incorporate childhood nostalgia and comfort{memory_text}
-        - Make {adult_name} the central character
-        - Include gentle breathing or relaxation cues
-        - End with a sense of peace and safety
-        - Use warm, comforting imagery
-        - Avoid triggering content
-        - Make it suitable for falling asleep to
-        - Address the specific concerns mentioned in the sleep issue
-        
-        The story should feel like a loving parent reading to their child, but adapted for an adult's emotional needs.
-        Include elements that help the reader feel safe, loved, and ready for sleep."""
+        prompt = story_service.get().adult_prompt(adult_name, final_sleep_issue, memories, custom_memory)
+        cache_key = None
+        if story_cache is not None:
+            cache_key = adult_story_key(sleep_issue, custom_sleep_reason, memories, custom_memory)
+        
+        def build_story(story_text):
+            # Create story object (temporary, not saved to Firebase)
+            return {
+                'title': f"{adult_name}'s Soothing Story",
+                'content': story_text,
+                'sleep_issue': sleep_issue,
+                'custom_sleep_reason': custom_sleep_reason,
+                'sleep_issue_display': sleep_issue_display,
+                'memories': memories,
+                'custom_memory': custom_memory,
+                'adult_name': adult_name,
+                'timestamp': datetime.now().isoformat(),
+                'type': 'adult_generated',
+                'temporary': True  # Mark as temporary
+            }
+        
+        if narrated:
+            return stream_narrated_story(prompt, build_story, 'Error generating adult story', cache_key, adult_name)
+        
+        if wants_event_stream():
+            return stream_story(prompt, build_story, 'Error generating adult story', cache_key, adult_name)
         
         # Generate story using Gemini
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
+        story_text, timing = generate_story_text(prompt, cache_key, adult_name)
         
-        if not response.text:
+        if not story_text:
             return jsonify({'error': 'No story generated. Please try again.'}), 500
-            
-        story_text = response.text
-        
-        # Create story object (temporary, not saved to Firebase)
-        story_data = {
-            'title': f"{adult_name}'s Soothing Story",
-            'content': story_text,
-            'sleep_issue': sleep_issue,
-            'custom_sleep_reason': custom_sleep_reason,
-            'sleep_issue_display': sleep_issue_display,
-            'memories': memories,
-            'custom_memory': custom_memory,
-            'adult_name': adult_name,
-            'timestamp': datetime.now().isoformat(),
-            'type': 'adult_generated',
-            'temporary': True  # Mark as temporary
-        }
         
         # Don't save to Firebase - return the story directly
-        return jsonify(story_data)
+        return jsonify(build_story(story_text)), {'Server-Timing': server_timing(timing)}
         
+    except UpstreamBusy:
+        raise
     except Exception as e:
-        print(f"Error generating adult story: {str(e)}")
+        record_error("Error generating adult story", e)
         return jsonify({'error': f'Story generation failed: {str(e)}'}), 500
 
+app = create_app()
+
 if __name__ == '__main__':
     # Create classic stories in Firebase if they don't exist
     try:
-        stories_ref = db.collection('stories')
+        stories_ref = firestore_db.get().collection('stories')
         if len(list(stories_ref.limit(1).stream())) == 0:
             classic_stories = [
                 {
@@ -362,5 +819,6 @@ if __name__ == '__main__':
             print("Classic stories added to Firebase")
     except Exception as e:
         print(f"Error setting up classic stories: {e}")
+    warm_caches()
     
     app.run(debug=True, port=5002) 
\ No newline at end of file
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import threading
+
+
+def atomic_write(path, data):
+    """Write bytes to path so readers see either the old file or the new one, never a partial one"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class AudioManifest:
+    """Index of pre-rendered classic story audio, stored as manifest.json next to the files.
+
+    Maps story ID -> {'file', 'duration', 'size', 'sha256', 'content_hash'}.
+    The file is re-read whenever it changes on disk, so a new render is
+    picked up by running workers without a restart.
+    """
+
+    def __init__(self, directory, filename='manifest.json'):
+        self.directory = directory
+        self.path = os.path.join(directory, filename)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._stories = {}
+
+    def stories(self):
+        """All manifest entries, keyed by story ID"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, encoding='utf-8') as f:
+                    self._stories = json.load(f).get('stories', {})
+                self._mtime = mtime
+            return self._stories
+
+    def entry(self, story_id):
+        """Manifest entry for one story, or None"""
+        return self.stories().get(story_id)
+
+    def save(self, stories):
+        """Replace the manifest with `stories`"""
+        data = json.dumps({'version': 1, 'stories': stories}, indent=2, sort_keys=True)
+        atomic_write(self.path, data.encode('utf-8'))
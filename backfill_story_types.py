@@ -0,0 +1,34 @@
+"""Give stories without a `type` field the type 'classic'.
+
+The story catalog asks Firestore for stories whose type isn't 'generated',
+and Firestore leaves documents without the field out of such queries. Older
+stories added without a type would therefore disappear from /api/stories;
+run this once to bring them back (earlier versions of the app listed them as
+classic stories).
+
+    python backfill_story_types.py [--dry-run]
+"""
+import argparse
+
+from dotenv import load_dotenv
+
+from clients import firestore_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set type='classic' on stories that have no type")
+    parser.add_argument('--dry-run', action='store_true', help='only report which stories would be updated')
+    args = parser.parse_args()
+
+    load_dotenv()
+    # A full scan, but only once: every story written by the app has a type
+    untyped = [doc for doc in firestore_db.get().collection('stories').stream() if 'type' not in doc.to_dict()]
+    for doc in untyped:
+        print(f"{'Would update' if args.dry_run else 'Updating'} {doc.id}: {doc.to_dict().get('title', '')}")
+        if not args.dry_run:
+            doc.reference.update({'type': 'classic'})
+    print(f"{len(untyped)} stories without a type")
+
+
+if __name__ == '__main__':
+    main()
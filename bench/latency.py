@@ -0,0 +1,172 @@
+"""End-to-end latency benchmark against the fake upstreams.
+
+Runs app.py in-process on a threaded server with UPSTREAM_BACKEND=fake, so
+no credentials or network access are needed. Each endpoint is driven at
+each concurrency level. The report gives p50/p95/p99 latency, throughput,
+status codes and the process RSS after each run.
+
+    python bench/latency.py --requests 100 --concurrency 1,8,32
+    python bench/latency.py --endpoints stories,tts --gemini-ms 800 --tts-error-rate 0.05
+
+Upstream latencies are medians of a log-normal distribution (see
+fake_upstreams.py); --sigma sets how heavy the tail is.
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_counter = itertools.count()
+
+
+def stories_request(base_url, story_ids):
+    return f"{base_url}/api/stories", None
+
+
+def story_request(base_url, story_ids):
+    return f"{base_url}/api/story/{story_ids[next(_counter) % len(story_ids)]}", None
+
+
+def generate_request(base_url, story_ids):
+    return f"{base_url}/api/generate-story", {'keywords': ['moon', 'owl'], 'childName': f'Kid{next(_counter)}'}
+
+
+def adult_request(base_url, story_ids):
+    return f"{base_url}/api/generate-adult-story", {
+        'adultName': f'Sam{next(_counter)}', 'sleepIssue': 'racing thoughts', 'memories': ['treehouse']
+    }
+
+
+def tts_request(base_url, story_ids):
+    # Distinct text every time so each request is a TTS cache miss
+    return f"{base_url}/api/tts", {'text': f"Sleep tight, little star number {next(_counter)}.", 'response': 'url'}
+
+
+ENDPOINTS = {
+    'stories': stories_request,
+    'story': story_request,
+    'generate': generate_request,
+    'adult': adult_request,
+    'tts': tts_request,
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def rss_mb():
+    """Current resident set size of this process in MiB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        # Peak rather than current, but the best available off Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def send(url, payload):
+    if payload is None:
+        request = urllib.request.Request(url)
+    else:
+        request = urllib.request.Request(
+            url, data=json.dumps(payload).encode('utf-8'), headers={'Content-Type': 'application/json'}
+        )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def run(base_url, make_request, story_ids, requests, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: send(*make_request(base_url, story_ids)), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for status, latency in results if status == 200)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        'throughput': requests / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'statuses': statuses,
+        'rss_mb': rss_mb(),
+    }
+
+
+def configure_fakes(args):
+    """Point the app at the fake upstreams; must run before app.py is imported"""
+    os.environ['UPSTREAM_BACKEND'] = 'fake'
+    os.environ.setdefault('TTS_CACHE_DIR', tempfile.mkdtemp(prefix='lullabai-bench-'))
+    os.environ['FAKE_LATENCY_SIGMA'] = str(args.sigma)
+    for upstream in ('firestore', 'gemini', 'tts'):
+        os.environ[f'FAKE_{upstream.upper()}_LATENCY_MS'] = str(getattr(args, f'{upstream}_ms'))
+        os.environ[f'FAKE_{upstream.upper()}_ERROR_RATE'] = str(getattr(args, f'{upstream}_error_rate'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='requests per endpoint and concurrency level')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated concurrency levels')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma-separated: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--sigma', type=float, default=0.5, help='log-normal spread of fake latencies')
+    for upstream, default_ms in (('firestore', 20), ('gemini', 1500), ('tts', 300)):
+        parser.add_argument(f'--{upstream}-ms', type=float, default=default_ms,
+                            help=f'median fake {upstream} latency in ms')
+        parser.add_argument(f'--{upstream}-error-rate', type=float, default=0.0,
+                            help=f'fraction of fake {upstream} calls that fail')
+    args = parser.parse_args()
+
+    configure_fakes(args)
+    import app
+
+    server = make_server('127.0.0.1', 0, app.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    story_ids = [story['id'] for story in app.story_catalog.get().list_stories()]
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    print(f"{args.requests} requests per run; fake latency medians: Firestore {args.firestore_ms}ms, "
+          f"Gemini {args.gemini_ms}ms, TTS {args.tts_ms}ms (sigma {args.sigma}); "
+          f"limits: Gemini {app.gemini_limiter.limit}, TTS {app.tts_limiter.limit}")
+    print(f"{'endpoint':>9} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MiB':>8}  statuses")
+    for name in args.endpoints.split(','):
+        for concurrency in levels:
+            result = run(base_url, ENDPOINTS[name], story_ids, args.requests, concurrency)
+            print(f"{name:>9} {concurrency:>5} {result['throughput']:8.2f} {result['p50'] * 1000:9.1f} "
+                  f"{result['p95'] * 1000:9.1f} {result['p99'] * 1000:9.1f} {result['rss_mb']:8.1f}  "
+                  f"{result['statuses']}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Load test for concurrent story generation against fake upstreams.
+
+Runs app.py in-process against the fake upstreams (see fake_upstreams.py),
+each taking a fixed latency. It then sends concurrent
+/api/generate-story requests to a server that handles one request at a time
+(like the old sync worker) and to a threaded one (like the gthread worker).
+Throughput, latency and status codes are reported for each, so 429
+backpressure from the upstream limits is visible too.
+
+    python bench/load_test.py --requests 40 --concurrency 8 --latency 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def stub_upstreams(latency):
+    """Use the fake upstreams, each taking exactly `latency` seconds per call"""
+    os.environ['UPSTREAM_BACKEND'] = 'fake'
+    os.environ['FAKE_LATENCY_SIGMA'] = '0'
+    for upstream in ('FIRESTORE', 'GEMINI', 'TTS'):
+        os.environ[f'FAKE_{upstream}_LATENCY_MS'] = str(latency * 1000)
+    os.environ.setdefault('TTS_CACHE_DIR', tempfile.mkdtemp(prefix='lullabai-load-'))
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode('utf-8'), headers={'Content-Type': 'application/json'}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def run(flask_app, threaded, requests, concurrency):
+    server = make_server('127.0.0.1', 0, flask_app, threaded=threaded, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/api/generate-story"
+    payload = {'keywords': ['moon', 'dragon'], 'childName': 'Ari'}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: post(url, payload), range(requests)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies = sorted(latency for status, latency in results if status == 200)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        'elapsed': elapsed,
+        'throughput': requests / elapsed,
+        'p50': statistics.median(latencies) if latencies else float('nan'),
+        'max': latencies[-1] if latencies else float('nan'),
+        'statuses': statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=40, help='total generation requests')
+    parser.add_argument('--concurrency', type=int, default=8, help='requests in flight at once')
+    parser.add_argument('--latency', type=float, default=0.5, help='stubbed upstream latency in seconds')
+    args = parser.parse_args()
+
+    stub_upstreams(args.latency)
+    import app
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, upstream latency {args.latency}s, "
+          f"Gemini limit {app.gemini_limiter.limit}")
+    for label, threaded in (('one request at a time', False), ('threaded', True)):
+        result = run(app.app, threaded, args.requests, args.concurrency)
+        print(f"{label:>22}: {result['throughput']:6.2f} req/s  p50 {result['p50']:.3f}s  "
+              f"max {result['max']:.3f}s  statuses {result['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
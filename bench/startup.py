@@ -0,0 +1,90 @@
+"""Startup benchmark: how soon a fresh worker process can answer requests.
+
+Each run starts a new interpreter, imports app.py and sends requests through
+the Flask test client, with the fake upstreams from fake_upstreams.py.
+Two modes are compared:
+
+  lazy   clients are created on the first request that needs them (the app as shipped)
+  eager  the Google client libraries are imported, clients are created and
+         the story catalog is loaded before the first request, the way app.py
+         used to do at import time
+
+    python bench/startup.py --runs 5
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ('firebase_admin', 'google.cloud.texttospeech', 'google.generativeai')
+
+
+def child(mode):
+    start = time.perf_counter()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from load_test import stub_upstreams
+
+    import app
+    imported = time.perf_counter()
+
+    if mode == 'eager':
+        for name in HEAVY_MODULES:
+            importlib.import_module(name)
+        stub_upstreams(0)
+        app.firestore_db.get()
+        app.tts_client.get()
+        app.story_service.get()
+        app.warm_caches()
+
+    client = app.app.test_client()
+    assert client.get('/').status_code == 200
+    first_page = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    if mode == 'lazy':
+        stub_upstreams(0)
+    assert client.get('/api/stories').status_code == 200
+    first_api = time.perf_counter()
+
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'first_page_ms': (first_page - start) * 1000,
+        'first_api_ms': (first_api - start) * 1000,
+        'loaded_before_first_page': loaded,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per mode')
+    parser.add_argument('--child', choices=('lazy', 'eager'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"median of {args.runs} runs, times from interpreter start (fake upstreams)")
+    for mode in ('eager', 'lazy'):
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', mode],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        medians = {
+            key: statistics.median(result[key] for result in results)
+            for key in ('import_ms', 'first_page_ms', 'first_api_ms')
+        }
+        print(f"{mode:>5}: import {medians['import_ms']:7.1f} ms  first page {medians['first_page_ms']:7.1f} ms  "
+              f"first API call {medians['first_api_ms']:7.1f} ms  "
+              f"clients loaded before first page: {', '.join(results[-1]['loaded_before_first_page']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Fingerprint and precompress static assets.
+
+Copies static/css, static/js and static/images into static/dist with a
+content hash in every file name. url() references in the CSS are rewritten
+to the hashed names. .gz files (and .br files when Brotli is installed) are
+written next to text assets. The mapping goes in static/dist/assets.json.
+The app then rewrites url_for('static', ...) links in the templates to the
+hashed copies and serves them with immutable caching.
+
+Files from earlier builds are kept, so pages already in browsers keep
+working during a deploy; --clean removes them first.
+
+    python build_assets.py [--clean]
+"""
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+from audio_manifest import atomic_write
+from static_assets import COMPRESSIBLE, ENCODING_SUFFIXES, brotli, compress
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+SOURCES = ('css', 'js', 'images')
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def source_files():
+    """Static file names (relative, with forward slashes) to fingerprint"""
+    for source in SOURCES:
+        for root, _, files in os.walk(os.path.join(STATIC_DIR, source)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+
+
+def fingerprinted_name(filename, data):
+    stem, extension = posixpath.splitext(filename)
+    return f"dist/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+
+
+def rewrite_css(filename, css, assets):
+    """Point url() references in a stylesheet at the fingerprinted files"""
+    directory = posixpath.dirname(filename)
+
+    def replace(match):
+        quote, reference = match.groups()
+        if reference.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path, _, suffix = reference.partition('?')
+        target = assets.get(posixpath.normpath(posixpath.join(directory, path)))
+        if target is None:
+            return match.group(0)
+        # Both files live under dist/, so the relative path keeps working
+        relative = posixpath.relpath(target, posixpath.join('dist', directory))
+        return f"url({quote}{relative}{'?' + suffix if suffix else ''}{quote})"
+
+    return CSS_URL.sub(replace, css)
+
+
+def write_asset(filename, data, assets):
+    target = fingerprinted_name(filename, data)
+    path = os.path.join(STATIC_DIR, *target.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        atomic_write(path, data)
+        if filename.endswith(COMPRESSIBLE):
+            for encoding, compressed in compress(data).items():
+                # Only keep a variant if it actually saves bytes
+                if len(compressed) < len(data):
+                    atomic_write(path + ENCODING_SUFFIXES[encoding], compressed)
+    assets[filename] = target
+    return target, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('--clean', action='store_true', help='remove files from earlier builds first')
+    args = parser.parse_args()
+
+    if args.clean and os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+
+    assets = {}
+    filenames = list(source_files())
+    # Stylesheets last, so the files they reference already have their hashed names
+    for filename in sorted(filenames, key=lambda name: name.endswith('.css')):
+        with open(os.path.join(STATIC_DIR, *filename.split('/')), 'rb') as f:
+            data = f.read()
+        if filename.endswith('.css'):
+            data = rewrite_css(filename, data.decode('utf-8'), assets).encode('utf-8')
+        target, size = write_asset(filename, data, assets)
+        print(f"{filename} -> {target} ({size} bytes)")
+
+    manifest = json.dumps({'version': 1, 'assets': assets}, indent=2, sort_keys=True)
+    atomic_write(os.path.join(DIST_DIR, 'assets.json'), manifest.encode('utf-8'))
+    if brotli is None:
+        print("Brotli is not installed; only gzip variants were written")
+    print(f"{len(assets)} assets written to {DIST_DIR}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import os
+import threading
+
+
+class ProcessLocal:
+    """A value built on first use and rebuilt in every new process.
+
+    gRPC channels and background threads don't survive a fork, so a client
+    created in a gunicorn master (or before any fork) must not be shared
+    with the workers. Each process builds its own the first time it asks.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._value = None
+        # A lock held by another thread at fork time would never be released in the child
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The value for this process, building it if needed"""
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._value = self.factory()
+                    self._pid = pid
+        return self._value
+
+    @property
+    def ready(self):
+        """Whether this process has built its value yet"""
+        return self._pid == os.getpid()
+
+
+def use_fakes():
+    """Whether UPSTREAM_BACKEND selects the local stand-ins in fake_upstreams.py"""
+    return os.environ.get('UPSTREAM_BACKEND', 'google').lower() == 'fake'
+
+
+def _make_firestore():
+    if use_fakes():
+        from fake_upstreams import FakeFirestore, FakeLatency
+        return FakeFirestore(FakeLatency.from_env('firestore', 20), stories=int(os.environ.get('FAKE_STORIES', '8')))
+
+    # The Google client libraries take most of the startup time, so they are
+    # imported on first use rather than when the app module is loaded
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    firebase_key_path = os.environ.get('FIREBASE_KEY_PATH', 'firebase-key.json')
+    if not os.path.exists(firebase_key_path):
+        print(f"Warning: Firebase key file {firebase_key_path} not found. Please ensure it exists.")
+        firebase_key_path = 'firebase-key.json'  # fallback
+
+    # One Firebase app per process, so a forked worker never reuses its parent's client
+    firebase_app = firebase_admin.initialize_app(
+        credentials.Certificate(firebase_key_path), name=f'lullabai-{os.getpid()}'
+    )
+    return firestore.client(firebase_app)
+
+
+def _make_tts():
+    if use_fakes():
+        from fake_upstreams import FakeLatency, FakeTTSClient
+        return FakeTTSClient(FakeLatency.from_env('tts', 300))
+
+    from google.cloud import texttospeech
+
+    tts_key_path = os.environ.get('TTS_KEY_PATH', 'tts-key.json')
+    if tts_key_path and os.path.exists(tts_key_path):
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = tts_key_path
+    else:
+        print(f"Warning: TTS key file {tts_key_path} not found. Text-to-speech will not work.")
+    return texttospeech.TextToSpeechClient()
+
+
+def _make_story_service():
+    from story_service import StoryService
+
+    if use_fakes():
+        from fake_upstreams import FakeGenerativeModel, FakeLatency
+        return StoryService(None, model_name='fake', model=FakeGenerativeModel(FakeLatency.from_env('gemini', 1500)))
+    return StoryService.from_env()
+
+
+firestore_db = ProcessLocal(_make_firestore)
+tts_client = ProcessLocal(_make_tts)
+story_service = ProcessLocal(_make_story_service)
@@ -0,0 +1,247 @@
+"""Local stand-ins for Firestore, Gemini and Google TTS.
+
+Used when UPSTREAM_BACKEND=fake, so the app can run and be benchmarked
+without credentials or network access. Each fake sleeps for a latency drawn
+from a log-normal distribution and fails a given fraction of calls.
+Both are set per upstream with environment variables:
+
+    FAKE_FIRESTORE_LATENCY_MS, FAKE_GEMINI_LATENCY_MS, FAKE_TTS_LATENCY_MS  median latency
+    FAKE_FIRESTORE_ERROR_RATE, FAKE_GEMINI_ERROR_RATE, FAKE_TTS_ERROR_RATE  0.0 - 1.0
+    FAKE_LATENCY_SIGMA                                                       spread of the tail
+"""
+import itertools
+import math
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+# Silent MPEG-2 Layer III frames (24 kHz, 32 kbps): 96 bytes and 24 ms each
+MP3_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+MP3_FRAME_SECONDS = 576 / 24000
+SPOKEN_CHARS_PER_SECOND = 15
+
+STORY_PARAGRAPHS = [
+    "Once upon a time, {name} found a tiny silver key under a moonlit pillow. "
+    "It was warm, as if someone had been holding it for a very long time.",
+    "{name} followed the soft glow of the key down a quiet path of stars. "
+    "Every step felt lighter, and the night air smelled of lavender and rain.",
+    "At the end of the path stood a little door with a golden handle. "
+    "Behind it, a sleepy owl was humming a lullaby about {keywords}.",
+    "The owl smiled and made room on a cushion of clouds. "
+    "{name} curled up, breathed in slowly, and breathed out even more slowly.",
+    "The stars dimmed one by one, like lights in a house going to sleep. "
+    "And {name}, safe and warm, drifted gently into dreams. The end.",
+]
+
+
+class FakeUpstreamError(Exception):
+    """A failure injected by a fake upstream"""
+
+
+class FakeLatency:
+    """Log-normal latency with a median of `median_ms` and a failure rate"""
+
+    def __init__(self, name, median_ms, error_rate=0.0, sigma=0.5):
+        self.name = name
+        self.median_ms = median_ms
+        self.error_rate = error_rate
+        self.sigma = sigma
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name, default_ms):
+        prefix = f'FAKE_{name.upper()}'
+        return cls(
+            name,
+            float(os.environ.get(f'{prefix}_LATENCY_MS', str(default_ms))),
+            error_rate=float(os.environ.get(f'{prefix}_ERROR_RATE', '0')),
+            sigma=float(os.environ.get('FAKE_LATENCY_SIGMA', '0.5'))
+        )
+
+    def sample(self):
+        """Seconds the next call should take"""
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            return self._random.lognormvariate(math.log(self.median_ms / 1000), self.sigma)
+
+    def wait(self, seconds=None):
+        """Sleep like a call to the upstream would, then maybe fail"""
+        time.sleep(self.sample() if seconds is None else seconds)
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise FakeUpstreamError(f"{self.name} (fake) failed")
+
+
+# Firestore
+
+class FakeDocument:
+    def __init__(self, doc_id, data, collection=None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self._collection = collection
+
+    @property
+    def reference(self):
+        return FakeDocumentReference(self._collection, self.id)
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        self._collection.latency.wait()
+        return FakeDocument(self.id, self._collection.docs.get(self.id), self._collection)
+
+    def update(self, fields):
+        self._collection.latency.wait()
+        self._collection.docs[self.id].update(fields)
+
+
+class FakeWatch:
+    def __init__(self, collection, callback):
+        self._collection = collection
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self._collection.watches.remove(self)
+        self.is_active = False
+
+
+class FakeQuery:
+    """Supports the where/limit/stream/on_snapshot calls the app makes"""
+
+    def __init__(self, collection, filters=(), limit=None):
+        self._collection = collection
+        self._filters = filters
+        self._limit = limit
+
+    def where(self, filter):
+        return FakeQuery(self._collection, self._filters + (filter,), self._limit)
+
+    def limit(self, count):
+        return FakeQuery(self._collection, self._filters, count)
+
+    def _matches(self, data):
+        for f in self._filters:
+            value = data.get(f.field_path)
+            if f.op_string == '==' and value != f.value:
+                return False
+            if f.op_string == '!=' and (value is None or value == f.value):
+                return False
+        return True
+
+    def _docs(self):
+        docs = [FakeDocument(doc_id, data, self._collection) for doc_id, data in list(self._collection.docs.items())
+                if self._matches(data)]
+        return docs[:self._limit] if self._limit is not None else docs
+
+    def stream(self):
+        self._collection.latency.wait()
+        return iter(self._docs())
+
+    def on_snapshot(self, callback):
+        watch = FakeWatch(self._collection, lambda: callback(self._docs(), [], datetime.now()))
+        self._collection.watches.append(watch)
+        watch.callback()
+        return watch
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, latency):
+        super().__init__(self)
+        self.latency = latency
+        self.docs = {}
+        self.watches = []
+        self._ids = itertools.count(1)
+
+    def document(self, doc_id):
+        return FakeDocumentReference(self, doc_id)
+
+    def add(self, data):
+        self.latency.wait()
+        doc_id = f'fake{next(self._ids):04d}'
+        self.docs[doc_id] = dict(data)
+        for watch in list(self.watches):
+            watch.callback()
+        return datetime.now(), FakeDocumentReference(self, doc_id)
+
+
+class FakeFirestore:
+    """In-memory Firestore with a few classic stories already in it"""
+
+    def __init__(self, latency, stories=8):
+        self.latency = latency
+        self._collections = {}
+        for number in range(1, stories + 1):
+            self._collections.setdefault('stories', FakeCollection(latency)).docs[f'classic{number:02d}'] = {
+                'title': f'Classic Story {number}',
+                'content': '\n\n'.join(STORY_PARAGRAPHS).format(name='Pip', keywords='the moon'),
+                'keywords': ['moon', 'owl'],
+                'timestamp': datetime.now().isoformat(),
+                'type': 'classic',
+            }
+
+    def collection(self, name):
+        return self._collections.setdefault(name, FakeCollection(self.latency))
+
+
+# Gemini
+
+class FakeGenerativeModel:
+    """Writes a short bedtime story for whoever the prompt names"""
+
+    def __init__(self, latency, chunk_ms=20.0):
+        self.latency = latency
+        self.chunk_ms = chunk_ms
+
+    def _story(self, prompt):
+        name = re.search(r'named (\w+)', prompt)
+        keywords = re.search(r'keywords: (.+?)\.\n', prompt)
+        return '\n\n'.join(STORY_PARAGRAPHS).format(
+            name=name.group(1) if name else 'the dreamer',
+            keywords=keywords.group(1) if keywords else 'soft blankets'
+        )
+
+    def _chunks(self, text, first_wait):
+        self.latency.wait(first_wait)
+        for index, paragraph in enumerate(text.split('\n\n')):
+            if index:
+                time.sleep(self.chunk_ms / 1000)
+            yield SimpleNamespace(text=paragraph + '\n\n')
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        text = self._story(prompt)
+        if stream:
+            # Time to first chunk is the sampled latency; the rest arrives steadily after it
+            return self._chunks(text, self.latency.sample())
+        self.latency.wait()
+        return SimpleNamespace(text=text)
+
+
+# Text-to-speech
+
+class FakeTTSClient:
+    """Returns silent MP3 audio about as long as the text would take to read"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def synthesize_speech(self, input, voice=None, audio_config=None, **kwargs):
+        self.latency.wait()
+        text = input.text or re.sub(r'<[^>]+>', '', input.ssml)
+        seconds = max(1.0, len(text) / SPOKEN_CHARS_PER_SECOND)
+        return SimpleNamespace(audio_content=MP3_FRAME * int(seconds / MP3_FRAME_SECONDS))
@@ -0,0 +1,21 @@
+# Gunicorn settings - see https://docs.gunicorn.org/en/stable/settings.html
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Threaded workers: a slow Gemini or TTS call only ties up one thread, so
+# static pages and cached API responses keep being served meanwhile. The
+# Google clients are thread-safe; per-upstream limits live in app.py.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+
+timeout = 120
+
+
+def post_worker_init(worker):
+    # Clients are created lazily in each worker (see clients.py). Load the story
+    # catalog in the background so the worker can take requests straight away.
+    import threading
+    from app import warm_caches
+    threading.Thread(target=warm_caches, name='warm-caches', daemon=True).start()
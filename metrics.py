@@ -0,0 +1,209 @@
+"""In-process metrics in the Prometheus text format, plus optional JSON logs.
+
+Counters, gauges and histograms are plain dicts of label values guarded by
+a lock, so recording a value costs a dict update. Each process (gunicorn
+worker) keeps its own numbers; /metrics reports the worker that answered.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+JSON_LOGS = os.environ.get('LOG_FORMAT', '').lower() == 'json'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_number(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """A value that only goes up"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. requests in flight"""
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds, by default) in cumulative buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_number(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'lullabai_http_requests_total', 'HTTP requests handled', ('method', 'route', 'status')))
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    'lullabai_http_request_duration_seconds', 'Time from request start to the end of the response body',
+    ('method', 'route')))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    'lullabai_http_requests_in_flight', 'Requests currently being handled'))
+HTTP_RESPONSE_BYTES = REGISTRY.register(Counter(
+    'lullabai_http_response_bytes_total', 'Response body bytes (responses with a known length)', ('route',)))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    'lullabai_http_errors_total', 'Requests that failed with an exception, handled by the route or not',
+    ('route', 'error')))
+
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    'lullabai_upstream_duration_seconds', 'Time spent waiting on an upstream call', ('upstream', 'operation')))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    'lullabai_upstream_in_flight', 'Upstream calls currently in progress', ('upstream',)))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    'lullabai_upstream_errors_total', 'Failed upstream calls by exception type', ('upstream', 'operation', 'error')))
+UPSTREAM_REJECTED = REGISTRY.register(Counter(
+    'lullabai_upstream_rejected_total', 'Calls turned away (429) because an upstream was at its concurrency limit',
+    ('upstream',)))
+UPSTREAM_LIMIT = REGISTRY.register(Gauge(
+    'lullabai_upstream_concurrency_limit', 'Concurrent calls allowed per upstream (0: no limit)', ('upstream',)))
+UPSTREAM_BYTES = REGISTRY.register(Counter(
+    'lullabai_upstream_bytes_total', 'Payload bytes sent to and received from upstreams', ('upstream', 'direction')))
+
+
+def log_event(event, **fields):
+    """Write one JSON log line to stderr when LOG_FORMAT=json"""
+    if not JSON_LOGS:
+        return
+    record = {'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), 'event': event, **fields}
+    print(json.dumps(record, default=str), file=sys.stderr, flush=True)
+
+
+@contextmanager
+def track_upstream(upstream, operation):
+    """Time an upstream call and count its failures by exception type.
+
+    Yields a dict; set call['seconds'] to report a different duration than
+    the time spent inside the block (e.g. a stream that excludes the time
+    its consumer spent between chunks).
+    """
+    call = {'seconds': None}
+    UPSTREAM_IN_FLIGHT.inc(upstream=upstream)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream=upstream, operation=operation, error=type(e).__name__)
+        log_event('upstream_error', upstream=upstream, operation=operation, error=type(e).__name__, message=str(e))
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(upstream=upstream)
+        seconds = call['seconds'] if call['seconds'] is not None else time.perf_counter() - start
+        UPSTREAM_SECONDS.observe(seconds, upstream=upstream, operation=operation)
+        # Per-request breakdown for the access log (not available on worker-pool threads)
+        if has_request_context() and 'upstream_seconds' in g:
+            g.upstream_seconds[upstream] = g.upstream_seconds.get(upstream, 0.0) + seconds
+
+
+def count_bytes(upstream, sent=0, received=0):
+    """Record payload sizes for an upstream call"""
+    if sent:
+        UPSTREAM_BYTES.inc(sent, upstream=upstream, direction='sent')
+    if received:
+        UPSTREAM_BYTES.inc(received, upstream=upstream, direction='received')
@@ -0,0 +1,51 @@
+# MPEG audio frame header tables (Layer III only)
+MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def strip_id3(data):
+    """Drop a leading ID3v2 tag so MP3 segments can be joined frame to frame"""
+    if data[:3] != b'ID3' or len(data) < 10:
+        return data
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return data[10 + size:]
+
+
+def mp3_duration(data):
+    """Duration in seconds of an MP3 (Layer III), found by walking its frame headers"""
+    data = strip_id3(data)
+    position = 0
+    duration = 0.0
+    while position + 4 <= len(data):
+        b1, b2 = data[position + 1], data[position + 2]
+        if data[position] != 0xFF or (b1 & 0xE0) != 0xE0:
+            position += 1
+            continue
+        version = (b1 >> 3) & 3
+        layer = (b1 >> 1) & 3
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 3
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            position += 1
+            continue
+        mpeg1 = version == 3
+        bitrate = MP3_BITRATES['mpeg1' if mpeg1 else 'mpeg2'][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 1
+        samples = 1152 if mpeg1 else 576
+        frame_length = (samples // 8) * bitrate // sample_rate + padding
+        duration += samples / sample_rate
+        position += frame_length
+    return duration
+
+
+def concatenate(parts):
+    """Join MP3 files into one, dropping the ID3 tags of all but the first"""
+    return b''.join(part if index == 0 else strip_id3(part) for index, part in enumerate(parts))
@@ -0,0 +1,128 @@
+"""Pre-render narration for the classic stories.
+
+Reads every classic story from Firestore and splits it into chunks within
+the TTS request limit. The chunks are synthesized in parallel and joined
+into one MP3 per story in static/audio. A manifest (manifest.json) records
+each story's file, duration, size and content hash. Stories whose text and
+voice are unchanged since the last run are skipped.
+
+    python prerender_audio.py [--workers 8] [--force] [--adopt-existing] [--dry-run]
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from audio_manifest import AudioManifest, atomic_write
+from clients import firestore_db, tts_client
+from mp3 import mp3_duration, strip_id3
+from speech import AUDIO_CONFIG, VOICE, synthesis_input
+from story_catalog import classic_stories_query
+from text_segments import pack_story
+
+AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'audio')
+
+def content_hash(story):
+    """Hash of everything that determines a story's audio"""
+    payload = json.dumps([
+        story.get('content', ''),
+        type(VOICE).to_json(VOICE, sort_keys=True, indent=None),
+        type(AUDIO_CONFIG).to_json(AUDIO_CONFIG, sort_keys=True, indent=None),
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_classic_stories(db):
+    """All stories that aren't generated ones, as (id, data) pairs"""
+    return [(doc.id, doc.to_dict()) for doc in classic_stories_query(db).stream()]
+
+
+def manifest_entry(file_name, audio, story_hash):
+    return {
+        'file': file_name,
+        'duration': round(mp3_duration(audio), 2),
+        'size': len(audio),
+        'sha256': hashlib.sha256(audio).hexdigest(),
+        'content_hash': story_hash,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-render classic story audio')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent TTS requests')
+    parser.add_argument('--force', action='store_true', help='re-render stories even if unchanged')
+    parser.add_argument('--adopt-existing', action='store_true',
+                        help='record existing classic_<id>.mp3 files for stories missing from the manifest '
+                             'instead of re-rendering them')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be rendered')
+    args = parser.parse_args()
+
+    load_dotenv()
+    manifest = AudioManifest(AUDIO_DIR)
+    entries = dict(manifest.stories())
+    stories = load_classic_stories(firestore_db.get())
+
+    to_render = []
+    for story_id, story in stories:
+        story_hash = content_hash(story)
+        entry = entries.get(story_id)
+        file_name = f"classic_{story_id}.mp3"
+        path = os.path.join(AUDIO_DIR, file_name)
+
+        if not args.force and entry and entry['content_hash'] == story_hash \
+                and os.path.exists(os.path.join(AUDIO_DIR, entry['file'])):
+            continue
+        if args.adopt_existing and not entry and os.path.exists(path):
+            with open(path, 'rb') as f:
+                entries[story_id] = manifest_entry(file_name, f.read(), story_hash)
+            print(f"Adopted existing audio for {story.get('title', story_id)}")
+            continue
+        if not story.get('content'):
+            print(f"Skipping {story_id}: no content")
+            continue
+        to_render.append((story_id, story, story_hash, file_name))
+
+    print(f"{len(stories)} classic stories, {len(to_render)} to render")
+    if args.dry_run:
+        for story_id, story, _, _ in to_render:
+            print(f"  would render {story_id}: {story.get('title', '')}")
+        return
+
+    if to_render:
+        client = tts_client.get()
+
+        def synthesize(text):
+            response = client.synthesize_speech(
+                input=synthesis_input(text), voice=VOICE, audio_config=AUDIO_CONFIG
+            )
+            return strip_id3(response.audio_content)
+
+        # Synthesize every chunk of every story through one pool, then join per story
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            jobs = [
+                (story_id, story, story_hash, file_name, [pool.submit(synthesize, chunk) for chunk in pack_story(story['content'], ssml=False)])
+                for story_id, story, story_hash, file_name in to_render
+            ]
+            for story_id, story, story_hash, file_name, futures in jobs:
+                try:
+                    audio = b''.join(future.result() for future in futures)
+                except Exception as e:
+                    print(f"Failed to render {story_id}: {e}")
+                    continue
+                atomic_write(os.path.join(AUDIO_DIR, file_name), audio)
+                entries[story_id] = manifest_entry(file_name, audio, story_hash)
+                print(f"Rendered {story.get('title', story_id)} ({len(futures)} chunks, "
+                      f"{entries[story_id]['duration']}s)")
+
+    # Forget stories that no longer exist
+    story_ids = {story_id for story_id, _ in stories}
+    entries = {story_id: entry for story_id, entry in entries.items() if story_id in story_ids}
+    manifest.save(entries)
+    print(f"Manifest written to {manifest.path}")
+
+
+if __name__ == '__main__':
+    main()
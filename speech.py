@@ -0,0 +1,22 @@
+from google.cloud import texttospeech
+
+# Voice and audio settings shared by the API and the classic audio pre-renderer.
+# Changing them changes every TTS cache key and audio content hash.
+VOICE = texttospeech.VoiceSelectionParams(
+    language_code="en-US",
+    name="en-US-Chirp3-HD-Laomedeia"
+)
+AUDIO_CONFIG = texttospeech.AudioConfig(
+    audio_encoding=texttospeech.AudioEncoding.MP3
+)
+
+
+def supports_ssml(voice=VOICE):
+    """Whether the voice accepts SSML input (Chirp 3 HD voices take plain text only)"""
+    return 'Chirp3-HD' not in voice.name
+
+
+def synthesis_input(text, ssml=False):
+    if ssml:
+        return texttospeech.SynthesisInput(ssml=text)
+    return texttospeech.SynthesisInput(text=text)
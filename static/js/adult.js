@@ -299,10 +299,13 @@ async function generateAdultStory() {
     storyGenerator.style.display = 'none';
     storyResult.style.display = 'none';
 
-    const response = await fetch('/api/generate-adult-story', {
+    // Narration is synthesized on the server while the story is generated
+    resetNarration();
+    const response = await fetch('/api/generate-adult-story/narrated', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
       },
       body: JSON.stringify({
         sleepIssue: selectedSleepIssue,
@@ -313,22 +316,104 @@ async function generateAdultStory() {
       })
     });
 
-    const story = await response.json();
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Failed to generate story');
+    }
 
-    if (response.ok) {
-      displayGeneratedAdultStory(story);
-    } else {
-      throw new Error(story.error || 'Failed to generate story');
+    // Render the story progressively, then switch to the full story view.
+    // Narration segments keep arriving after the story itself.
+    let storyText = '';
+    let story = null;
+    await readEventStream(response, (event, data) => {
+      if (event === 'chunk') {
+        storyText += data.text;
+        displayStreamingStory(storyText);
+      } else if (event === 'story') {
+        story = data;
+        displayGeneratedAdultStory(story);
+      } else if (event === 'segment') {
+        addNarrationSegment(data.audio_url, data.text);
+      } else if (event === 'done') {
+        finishNarration(false);
+      } else if (event === 'error') {
+        if (!story) {
+          throw new Error(data.error);
+        }
+        // The story is fine, only its narration failed
+        console.error('Error generating narration:', data.error);
+        finishNarration(true);
+      }
+    });
+
+    if (!story) {
+      throw new Error('Story generation ended unexpectedly');
     }
   } catch (err) {
     console.error('Error generating adult story:', err);
     alert('Sorry, we couldn\'t generate your story. Please try again.');
+    storyResult.style.display = 'none';
+    storyGenerator.style.display = 'block';
   } finally {
     loading.style.display = 'none';
+    // A dropped connection ends the stream without a 'done' event; stop
+    // waiting for segments that will never arrive
+    if (!narration.complete) {
+      finishNarration(true);
+    }
     // Don't show the story generator here - let displayGeneratedAdultStory handle it
   }
 }
 
+// Show the story text as it streams in from the server
+function displayStreamingStory(text) {
+  const loading = document.getElementById('loading');
+  const storyResult = document.getElementById('storyResult');
+  const storyContent = document.getElementById('storyContent');
+
+  loading.style.display = 'none';
+  storyResult.style.display = 'block';
+
+  let storyText = storyContent.querySelector('.story-text.streaming');
+  if (!storyText) {
+    storyContent.innerHTML = '<div class="story-text streaming" style="white-space: pre-wrap;"></div>';
+    storyText = storyContent.querySelector('.story-text');
+  }
+  storyText.textContent = text;
+}
+
+// Read a Server-Sent Events response, calling onEvent(event, data) for each event
+async function readEventStream(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) {
+          event = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+          data += line.slice(6);
+        }
+      });
+      onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 // Display generated adult story
 function displayGeneratedAdultStory(story) {
   const storyResult = document.getElementById('storyResult');
@@ -389,7 +474,11 @@ function setupStoryActions() {
 
       const readButton = e.target;
       const pauseButton = document.getElementById('pauseBtn');
-      readStoryAloudStreaming(storyText, readButton, pauseButton);
+      if (narration.urls.length > 0 && !narration.failed) {
+        playNarration(readButton, pauseButton);
+      } else {
+        readStoryAloudBatch(storyText, readButton, pauseButton);
+      }
     }
   });
 
@@ -403,135 +492,202 @@ function setupStoryActions() {
   });
 }
 
-// Streaming TTS implementation using Google TTS API
-async function readStoryAloudStreaming(text, readButton, pauseButton) {
-  if (!text) {
-    alert('No text to read');
-    return;
-  }
+// Narration audio for the current story, filled in as the server synthesizes it
+const narration = {
+  urls: [],
+  texts: [],
+  audios: {},
+  index: 0,
+  complete: false,
+  failed: false,
+  waiting: false,
+  readButton: null,
+  pauseButton: null
+};
+
+// Forget the narration of the previous story
+function resetNarration() {
+  narration.urls.forEach(url => {
+    if (url.startsWith('blob:')) {
+      URL.revokeObjectURL(url);
+    }
+  });
+  narration.urls = [];
+  narration.texts = [];
+  narration.audios = {};
+  narration.index = 0;
+  narration.complete = false;
+  narration.failed = false;
+  narration.waiting = false;
+}
 
-  try {
-    // Show loading state
-    readButton.textContent = '🔄 Generating...';
-    readButton.disabled = true;
-    pauseButton.style.display = 'none';
+// Add a narration segment, resuming playback if it was waiting for it
+function addNarrationSegment(audioUrl, text) {
+  narration.urls.push(audioUrl);
+  narration.texts.push(text);
+  if (narration.waiting) {
+    narration.waiting = false;
+    playNextSegment();
+  } else {
+    prefetchNarration();
+  }
+}
 
-    // Split text into paragraphs for more natural breaks
-    const paragraphs = text.split(/\n\s*\n/).filter(p => p.trim().length > 0);
+// Mark the narration as complete (or failed)
+function finishNarration(failed) {
+  narration.complete = true;
+  narration.failed = failed;
+  if (narration.waiting) {
+    narration.waiting = false;
+    resetButtonState(narration.readButton, narration.pauseButton);
+  }
+}
 
-    // Generate first paragraph immediately
-    const firstChunk = paragraphs[0];
+// Keep the next few segments loading so there is no gap between them
+function prefetchNarration() {
+  if (!narration.readButton) {
+    return;
+  }
+  const end = Math.min(narration.index + 3, narration.urls.length);
+  for (let i = narration.index; i < end; i++) {
+    if (!narration.audios[i]) {
+      const audio = new Audio(narration.urls[i]);
+      audio.preload = 'auto';
+      audio.onerror = () => recoverSegment(audio, i);
+      narration.audios[i] = audio;
+    }
+  }
+}
 
-    // Start generating first chunk
+// Segment URLs are served from the cache of the instance that synthesized
+// them. If another instance answered with a 404, synthesize the segment's
+// text again and play it from a blob instead.
+async function recoverSegment(audio, index) {
+  audio.onerror = null;
+  const text = narration.texts[index];
+  try {
+    if (!text) {
+      throw new Error('No text for segment');
+    }
     const response = await fetch('/api/tts', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ text: firstChunk })
+      body: JSON.stringify({ text: text, response: 'audio' })
     });
-
     if (!response.ok) {
       throw new Error('Failed to generate audio');
     }
+    narration.urls[index] = URL.createObjectURL(await response.blob());
+    audio.src = narration.urls[index];
+    if (window.currentAudio === audio && !window.isUserPaused) {
+      audio.play();
+    }
+  } catch (error) {
+    console.error('Error recovering narration segment:', error);
+    // Skip the segment rather than stalling the narration
+    if (window.currentAudio === audio) {
+      playNextSegment();
+    }
+  }
+}
 
-    const data = await response.json();
-
-    // Create audio element and start playing immediately
-    const audio = new Audio(data.audio_url);
-    window.currentAudio = audio;
-    window.isUserPaused = false; // Track if user explicitly paused
+// Play the pre-synthesized narration from the start
+function playNarration(readButton, pauseButton) {
+  narration.index = 0;
+  narration.audios = {};
+  narration.readButton = readButton;
+  narration.pauseButton = pauseButton;
+  window.isUserPaused = false;
+
+  // Show pause button, hide read button
+  readButton.style.display = 'none';
+  pauseButton.style.display = 'inline-block';
+  pauseButton.textContent = '⏸️ Pause';
+  pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
+
+  playNextSegment();
+}
 
-    // Show pause button, hide read button
-    readButton.style.display = 'none';
-    pauseButton.style.display = 'inline-block';
-    pauseButton.textContent = '⏸️ Pause';
+// Play the next narration segment, or wait for it if it isn't ready yet
+function playNextSegment() {
+  const readButton = narration.readButton;
+  const pauseButton = narration.pauseButton;
 
-    // Set up click handlers
-    pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
+  if (narration.index >= narration.urls.length) {
+    if (narration.complete) {
+      // Story finished
+      resetButtonState(readButton, pauseButton);
+    } else {
+      narration.waiting = true;
+    }
+    return;
+  }
 
-    // Play first chunk immediately
-    audio.play();
+  prefetchNarration();
+  const audio = narration.audios[narration.index];
+  delete narration.audios[narration.index];
+  narration.index++;
+  window.currentAudio = audio;
 
-    // Handle audio events
-    audio.onended = () => {
-      // Generate next chunk while current is playing
-      generateNextChunk(paragraphs.slice(1), readButton, pauseButton);
-    };
+  audio.onended = () => playNextSegment();
 
-    // Only change button state if user explicitly paused
-    audio.onpause = () => {
-      if (window.isUserPaused) {
-        pauseButton.textContent = '▶️ Resume';
-        pauseButton.onclick = () => resumeSpeech(readButton, pauseButton);
-      }
-    };
+  // Only change button state if user explicitly paused
+  audio.onpause = () => {
+    if (window.isUserPaused) {
+      pauseButton.textContent = '▶️ Resume';
+      pauseButton.onclick = () => resumeSpeech(readButton, pauseButton);
+    }
+  };
 
-    audio.onplay = () => {
-      // Reset user pause flag when audio starts playing
-      window.isUserPaused = false;
-      pauseButton.textContent = '⏸️ Pause';
-      pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
-    };
+  audio.onplay = () => {
+    // Reset user pause flag when audio starts playing
+    window.isUserPaused = false;
+    pauseButton.textContent = '⏸️ Pause';
+    pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
+  };
 
-  } catch (error) {
-    console.error('TTS Error:', error);
-    alert(`Failed to generate audio: ${error.message}`);
-    resetButtonState(readButton, pauseButton);
-  }
+  audio.play();
 }
 
-async function generateNextChunk(remainingParagraphs, readButton, pauseButton) {
-  if (remainingParagraphs.length === 0) {
-    // Story finished
-    resetButtonState(readButton, pauseButton);
+// Synthesize the whole story in one batch request (the server packs it into
+// as few TTS calls as possible) and play the joined MP3 from a blob
+async function readStoryAloudBatch(text, readButton, pauseButton) {
+  if (!text) {
+    alert('No text to read');
     return;
   }
 
   try {
-    const chunk = remainingParagraphs[0];
+    // Show loading state
+    readButton.textContent = '🔄 Generating...';
+    readButton.disabled = true;
+    pauseButton.style.display = 'none';
 
-    const response = await fetch('/api/tts', {
+    const response = await fetch('/api/tts/batch', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ text: chunk })
+      body: JSON.stringify({ text: text, response: 'audio' })
     });
 
     if (!response.ok) {
-      throw new Error('Failed to generate next chunk');
+      throw new Error('Failed to generate audio');
     }
 
-    const data = await response.json();
-    const audio = new Audio(data.audio_url);
-
-    // Play next chunk
-    audio.play();
-    window.currentAudio = audio;
-
-    // Set up for next chunk
-    audio.onended = () => {
-      generateNextChunk(remainingParagraphs.slice(1), readButton, pauseButton);
-    };
-
-    // Only change button state if user explicitly paused
-    audio.onpause = () => {
-      if (window.isUserPaused) {
-        pauseButton.textContent = '▶️ Resume';
-        pauseButton.onclick = () => resumeSpeech(readButton, pauseButton);
-      }
-    };
-
-    audio.onplay = () => {
-      // Reset user pause flag when audio starts playing
-      window.isUserPaused = false;
-      pauseButton.textContent = '⏸️ Pause';
-      pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
-    };
+    const audio = await response.blob();
+    resetNarration();
+    narration.urls.push(URL.createObjectURL(audio));
+    narration.texts.push(null);
+    narration.complete = true;
+    playNarration(readButton, pauseButton);
 
   } catch (error) {
-    console.error('Error generating next chunk:', error);
+    console.error('TTS Error:', error);
+    alert(`Failed to generate audio: ${error.message}`);
+    resetButtonState(readButton, pauseButton);
   }
 }
 
@@ -567,9 +723,11 @@ function resetButtonState(readButton, pauseButton) {
 function resetStoryGenerator() {
   // Stop any ongoing speech
   if (window.currentAudio) {
+    window.currentAudio.onended = null;
     window.currentAudio.pause();
     window.currentAudio.src = ''; // Clear audio source
   }
+  resetNarration();
 
   // Clear selected sleep issue
   selectedSleepIssue = null;
@@ -163,6 +163,7 @@ function displayStoryInModal(story) {
   // Store the story content and ID for later use
   storyContent.dataset.storyContent = story.content;
   storyContent.dataset.storyId = story.id;
+  storyContent.dataset.audioUrl = story.audio_url || '';
 }
 
 // Close story modal
@@ -203,17 +204,16 @@ async function readStoryAloud(text, readButton, pauseButton) {
     readButton.disabled = true;
     pauseButton.style.display = 'none';
 
-    // Get the story ID from the story content element
+    // The server tells us where the pre-rendered audio for this story lives
     const storyContent = document.getElementById('storyContent');
-    const storyId = storyContent.dataset.storyId;
+    const audioUrl = storyContent.dataset.audioUrl;
 
-    if (!storyId) {
-      throw new Error('Story ID not found');
+    if (!audioUrl) {
+      alert('Audio is not available for this story yet.');
+      resetButtonState(readButton, pauseButton);
+      return;
     }
 
-    // Construct the audio file path
-    const audioUrl = `/static/audio/classic_${storyId}.mp3`;
-
     // Create audio element and start playing
     const audio = new Audio(audioUrl);
     window.currentAudio = audio;
@@ -157,6 +157,7 @@ async function generateStory() {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
       },
       body: JSON.stringify({
         keywords: selectedKeywords,
@@ -164,22 +165,89 @@ async function generateStory() {
       })
     });
 
-    const story = await response.json();
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Failed to generate story');
+    }
 
-    if (response.ok) {
-      displayGeneratedStory(story);
-    } else {
-      throw new Error(story.error || 'Failed to generate story');
+    // Render the story progressively, then switch to the full story view
+    let storyText = '';
+    let story = null;
+    await readEventStream(response, (event, data) => {
+      if (event === 'chunk') {
+        storyText += data.text;
+        displayStreamingStory(storyText);
+      } else if (event === 'story') {
+        story = data;
+      } else if (event === 'error') {
+        throw new Error(data.error);
+      }
+    });
+
+    if (!story) {
+      throw new Error('Story generation ended unexpectedly');
     }
+    displayGeneratedStory(story);
   } catch (err) {
     console.error('Error generating story:', err);
     alert('Sorry, we couldn\'t generate your story. Please try again.');
+    storyResult.style.display = 'none';
+    storyGenerator.style.display = 'block';
   } finally {
     loading.style.display = 'none';
     // Don't show the story generator here - let displayGeneratedStory handle it
   }
 }
 
+// Show the story text as it streams in from the server
+function displayStreamingStory(text) {
+  const loading = document.getElementById('loading');
+  const storyResult = document.getElementById('storyResult');
+  const storyContent = document.getElementById('storyContent');
+
+  loading.style.display = 'none';
+  storyResult.style.display = 'block';
+
+  let storyText = storyContent.querySelector('.story-text.streaming');
+  if (!storyText) {
+    storyContent.innerHTML = '<div class="story-text streaming" style="white-space: pre-wrap;"></div>';
+    storyText = storyContent.querySelector('.story-text');
+  }
+  storyText.textContent = text;
+}
+
+// Read a Server-Sent Events response, calling onEvent(event, data) for each event
+async function readEventStream(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) {
+          event = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+          data += line.slice(6);
+        }
+      });
+      onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 // Display generated story
 function displayGeneratedStory(story) {
   const storyResult = document.getElementById('storyResult');
@@ -238,7 +306,7 @@ function setupStoryActions() {
 
       const readButton = e.target;
       const pauseButton = document.getElementById('pauseBtn');
-      readStoryAloudStreaming(storyText, readButton, pauseButton);
+      readStoryAloudBatch(storyText, readButton, pauseButton);
     }
   });
 
@@ -252,8 +320,11 @@ function setupStoryActions() {
   });
 }
 
-// Streaming TTS implementation
-async function readStoryAloudStreaming(text, readButton, pauseButton) {
+// Synthesize the whole story in one batch request (the server packs it into
+// as few TTS calls as possible) and play the joined MP3. The audio comes back
+// in the response, since cached audio URLs only work on the instance that
+// synthesized them.
+async function readStoryAloudBatch(text, readButton, pauseButton) {
   if (!text) {
     alert('No text to read');
     return;
@@ -265,63 +336,32 @@ async function readStoryAloudStreaming(text, readButton, pauseButton) {
     readButton.disabled = true;
     pauseButton.style.display = 'none';
 
-    // Split text into paragraphs for more natural breaks
-    const paragraphs = text.split(/\n\s*\n/).filter(p => p.trim().length > 0);
-
-    // Generate first paragraph immediately
-    const firstChunk = paragraphs[0];
-
-    // Start generating first chunk
-    const response = await fetch('/api/tts', {
+    const response = await fetch('/api/tts/batch', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ text: firstChunk })
+      body: JSON.stringify({ text: text, response: 'audio' })
     });
 
     if (!response.ok) {
       throw new Error('Failed to generate audio');
     }
 
-    const data = await response.json();
-
-    // Create audio element and start playing immediately
-    const audio = new Audio(data.audio_url);
-    window.currentAudio = audio;
+    if (window.storyAudioUrl) {
+      URL.revokeObjectURL(window.storyAudioUrl);
+    }
+    window.storyAudioUrl = URL.createObjectURL(await response.blob());
+    const urls = [window.storyAudioUrl];
     window.isUserPaused = false; // Track if user explicitly paused
 
     // Show pause button, hide read button
     readButton.style.display = 'none';
     pauseButton.style.display = 'inline-block';
     pauseButton.textContent = '⏸️ Pause';
-
-    // Set up click handlers
     pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
 
-    // Play first chunk immediately
-    audio.play();
-
-    // Handle audio events
-    audio.onended = () => {
-      // Generate next chunk while current is playing
-      generateNextChunk(paragraphs.slice(1), readButton, pauseButton);
-    };
-
-    // Only change button state if user explicitly paused
-    audio.onpause = () => {
-      if (window.isUserPaused) {
-        pauseButton.textContent = '▶️ Resume';
-        pauseButton.onclick = () => resumeSpeech(readButton, pauseButton);
-      }
-    };
-
-    audio.onplay = () => {
-      // Reset user pause flag when audio starts playing
-      window.isUserPaused = false;
-      pauseButton.textContent = '⏸️ Pause';
-      pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
-    };
+    playSegment(urls, 0, null, readButton, pauseButton);
 
   } catch (error) {
     console.error('TTS Error:', error);
@@ -330,58 +370,40 @@ async function readStoryAloudStreaming(text, readButton, pauseButton) {
   }
 }
 
-async function generateNextChunk(remainingParagraphs, readButton, pauseButton) {
-  if (remainingParagraphs.length === 0) {
+// Play one segment, preloading the next so there is no gap between them
+function playSegment(urls, index, audio, readButton, pauseButton) {
+  if (index >= urls.length) {
     // Story finished
     resetButtonState(readButton, pauseButton);
     return;
   }
 
-  try {
-    const chunk = remainingParagraphs[0];
+  audio = audio || new Audio(urls[index]);
+  let next = null;
+  if (index + 1 < urls.length) {
+    next = new Audio(urls[index + 1]);
+    next.preload = 'auto';
+  }
+  window.currentAudio = audio;
 
-    const response = await fetch('/api/tts', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({ text: chunk })
-    });
+  audio.onended = () => playSegment(urls, index + 1, next, readButton, pauseButton);
 
-    if (!response.ok) {
-      throw new Error('Failed to generate next chunk');
+  // Only change button state if user explicitly paused
+  audio.onpause = () => {
+    if (window.isUserPaused) {
+      pauseButton.textContent = '▶️ Resume';
+      pauseButton.onclick = () => resumeSpeech(readButton, pauseButton);
     }
+  };
 
-    const data = await response.json();
-    const audio = new Audio(data.audio_url);
-
-    // Play next chunk
-    audio.play();
-    window.currentAudio = audio;
-
-    // Set up for next chunk
-    audio.onended = () => {
-      generateNextChunk(remainingParagraphs.slice(1), readButton, pauseButton);
-    };
-
-    // Only change button state if user explicitly paused
-    audio.onpause = () => {
-      if (window.isUserPaused) {
-        pauseButton.textContent = '▶️ Resume';
-        pauseButton.onclick = () => resumeSpeech(readButton, pauseButton);
-      }
-    };
-
-    audio.onplay = () => {
-      // Reset user pause flag when audio starts playing
-      window.isUserPaused = false;
-      pauseButton.textContent = '⏸️ Pause';
-      pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
-    };
+  audio.onplay = () => {
+    // Reset user pause flag when audio starts playing
+    window.isUserPaused = false;
+    pauseButton.textContent = '⏸️ Pause';
+    pauseButton.onclick = () => pauseSpeech(readButton, pauseButton);
+  };
 
-  } catch (error) {
-    console.error('Error generating next chunk:', error);
-  }
+  audio.play();
 }
 
 // Pause audio
@@ -404,6 +426,14 @@ function resumeSpeech(readButton, pauseButton) {
   }
 }
 
+// Reset button state
+function resetButtonState(readButton, pauseButton) {
+  readButton.style.display = 'inline-block';
+  readButton.textContent = '🔊 Read to Me';
+  readButton.disabled = false;
+  pauseButton.style.display = 'none';
+}
+
 // Reset story generator
 function resetStoryGenerator() {
   // Stop any ongoing speech
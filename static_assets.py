@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, abort, current_app, render_template, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are built and served
+    brotli = None
+
+# Text assets worth compressing; images and audio are already compressed
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.json', '.txt')
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Names written by build_assets.py: dist/<path>.<12 hex digits of content hash>.<ext>
+FINGERPRINTED = re.compile(r'^dist/.+\.[0-9a-f]{12}\.[^./]+$')
+REVALIDATE = 'no-cache'
+
+
+def compress(data):
+    """Compressed variants of data, keyed by Content-Encoding"""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+
+def choose_encoding(accept_encoding, available):
+    """The encoding from `available` the client prefers (brotli over gzip), or None"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+class AssetManifest:
+    """Map from static file names to their fingerprinted copies (see build_assets.py).
+
+    The manifest is re-read whenever it changes on disk, so a new build is
+    picked up without a restart. Without one, files are served unhashed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._assets = {}
+
+    def version(self):
+        """Changes whenever a new build is written (None without a manifest)"""
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def assets(self):
+        mtime = self.version()
+        if mtime is None:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, encoding='utf-8') as f:
+                    self._assets = json.load(f).get('assets', {})
+                self._mtime = mtime
+            return self._assets
+
+    def lookup(self, filename):
+        """Fingerprinted path (relative to the static folder) for filename, or None"""
+        return self.assets().get(filename)
+
+
+def send_static(static_folder, filename, immutable):
+    """Send a static file, preferring a precompressed variant the client accepts.
+
+    Conditional requests (ETag, If-None-Match, Range) are handled by
+    send_file. Fingerprinted or versioned files are cached for a year;
+    anything else must be revalidated.
+    """
+    path = safe_join(static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    compressible = filename.endswith(COMPRESSIBLE)
+    encoding = None
+    if compressible:
+        available = [name for name, suffix in ENCODING_SUFFIXES.items() if os.path.isfile(path + suffix)]
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), available)
+
+    response = send_file(
+        path + ENCODING_SUFFIXES[encoding] if encoding else path,
+        mimetype=mimetype,
+        conditional=True
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE if immutable else REVALIDATE
+    return response
+
+
+class PageCache:
+    """Rendered HTML for pages with no per-request content.
+
+    Each template is rendered once per process, with compressed variants and
+    an ETag, so repeat visits get a 304 and new ones skip Jinja entirely.
+    Pages are rendered again when `version()` changes (the asset manifest's
+    mtime, so a new build's links are picked up), and every time in debug
+    mode so template edits show up immediately.
+    """
+
+    def __init__(self, version=lambda: None):
+        self.version = version
+        self._pages = {}
+
+    def _page(self, template):
+        version = self.version()
+        page = self._pages.get(template)
+        if page is None or page['version'] != version or current_app.debug:
+            body = render_template(template).encode('utf-8')
+            page = {
+                'version': version,
+                'etag': hashlib.sha256(body).hexdigest()[:16],
+                'variants': {None: body, **compress(body)},
+            }
+            self._pages[template] = page
+        return page
+
+    def response(self, template):
+        page = self._page(template)
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), page['variants'])
+        response = Response(page['variants'][encoding], mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{page['etag']}-{encoding}" if encoding else page['etag'])
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = REVALIDATE
+        return response.make_conditional(request)
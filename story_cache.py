@@ -0,0 +1,211 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from string import Template
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def child_story_key(keywords):
+    """Cache key for a children's story: the keywords, normalized and sorted"""
+    return json.dumps(['child', sorted({_normalize(k) for k in keywords if k.strip()})])
+
+
+def adult_story_key(sleep_issue, custom_sleep_reason, memories, custom_memory):
+    """Cache key for a grown-ups story: sleep issue and memories, normalized"""
+    return json.dumps([
+        'adult',
+        _normalize(custom_sleep_reason or sleep_issue),
+        sorted({_normalize(m) for m in memories if m.strip()}),
+        _normalize(custom_memory)
+    ])
+
+
+def to_template(text, name):
+    """Turn a story written for `name` into a template with the name as a placeholder.
+
+    Only the capitalized name, and the name as typed if it has capitals of its
+    own, are replaced (case-sensitively), so a reader called "hope" doesn't
+    turn every "hope" in the story into a name. Returns None when the name
+    doesn't appear in the story: it may address the reader in a form we can't
+    swap, so it isn't reusable.
+    """
+    template = text.replace('$', '$$')
+    if name:
+        forms = {name[:1].upper() + name[1:]}
+        if name != name.lower():
+            forms.add(name)
+        pattern = r'\b(?:' + '|'.join(re.escape(form) for form in sorted(forms)) + r')\b'
+        template, count = re.subn(pattern, '${name}', template)
+        if not count:
+            return None
+    return template
+
+
+class _Flight:
+    """One in-progress generation that identical requests can wait on.
+
+    The request that started it (the leader) must call land() or fail()
+    when it's done; the others call wait().
+    """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.done = threading.Event()
+        self.template = None
+        self.error = None
+
+    def _finish(self):
+        with self.cache._lock:
+            if self.cache._flights.get(self.key) is self:
+                del self.cache._flights[self.key]
+        self.done.set()
+
+    def land(self, name, text):
+        """Store the leader's story (None if it has none) and wake the followers"""
+        if self.done.is_set():
+            return
+        try:
+            self.template = self.cache.store(self.key, name, text)
+        finally:
+            self._finish()
+
+    def fail(self, error):
+        """Pass the leader's error on to the followers"""
+        if self.done.is_set():
+            return
+        self.error = error
+        self._finish()
+
+    def wait(self, name):
+        """The leader's story for `name`, or None if it can't be shared"""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        if self.template is None:
+            return None
+        return Template(self.template).safe_substitute(name=name)
+
+
+class GeneratedStoryCache:
+    """Cache of generated stories keyed on the normalized request.
+
+    Stories are stored as templates with the reader's name substituted at
+    serve time, so "dragon, moon" for Ava can be served to Leo. Up to
+    `variants` different stories are collected per key before the cache
+    starts answering, and a random one is served, so repeat visitors still
+    get variety. Entries expire after `ttl` seconds and the least recently
+    used keys are evicted beyond `max_keys`. Concurrent misses for the same
+    key share a single upstream call.
+    """
+
+    def __init__(self, variants=3, ttl=24 * 60 * 60, max_keys=1000):
+        self.variants = variants
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _ready_entry(self, key):
+        # Caller holds the lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['created'] > self.ttl:
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        if len(entry['templates']) < self.variants:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def join(self, key, name):
+        """Look up `key`, or start or join the generation of a story for it.
+
+        Returns (story, flight, leader). story is a cached story for `name`,
+        or None on a miss; then the caller is either the leader of a new
+        flight, which must generate the story and land() it, or a follower
+        that can wait() for the leader's story.
+        """
+        with self._lock:
+            entry = self._ready_entry(key)
+            if entry is not None:
+                self.hits += 1
+                return Template(random.choice(entry['templates'])).safe_substitute(name=name), None, False
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return None, flight, False
+            self.misses += 1
+            flight = self._flights[key] = _Flight(self, key)
+            return None, flight, True
+
+    def store(self, key, name, text):
+        """Add a story generated for `name` to the variant pool for `key`"""
+        if not text:
+            return None
+        template = to_template(text, name)
+        if template is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {'created': time.monotonic(), 'templates': []}
+                self._entries[key] = entry
+            if len(entry['templates']) < self.variants:
+                entry['templates'].append(template)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def get_or_generate(self, key, name, generate):
+        """Return a story for `name`, calling generate() only when needed.
+
+        generate() must return the story text written for `name`. While it
+        runs, identical requests wait for its result instead of starting their
+        own upstream call. If that story can't be shared, they call generate()
+        themselves.
+        """
+        story, flight, leader = self.join(key, name)
+        if story is not None:
+            return story
+        if not leader:
+            story = flight.wait(name)
+            return generate() if story is None else story
+
+        try:
+            text = generate()
+            flight.land(name, text)
+            return text
+        except Exception as e:
+            flight.fail(e)
+            raise
+        finally:
+            # Wakes the waiters if generate() was interrupted; a no-op otherwise
+            flight.land(name, None)
+
+    def stats(self):
+        """Hit ratio and size counters for monitoring"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_ratio': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'keys': len(self._entries),
+        }
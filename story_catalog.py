@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import nullcontext
+
+from metrics import track_upstream
+
+
+def classic_stories_query(db):
+    """Firestore query for classic stories (generated ones are filtered server-side).
+
+    Firestore's != filter skips documents without a `type` field, so stories
+    stored without one must be given one (see backfill_story_types.py).
+    """
+    from firebase_admin import firestore  # loaded on first use to keep startup fast
+
+    return db.collection('stories').where(filter=firestore.FieldFilter('type', '!=', 'generated'))
+
+
+class StoryCatalog:
+    """In-process cache of the classic story catalog.
+
+    Serves /api/stories and /api/story/<id> from memory. Entries expire after
+    `ttl` seconds unless a Firestore snapshot listener is keeping them fresh,
+    and at most `max_size` stories are held. If the listener stops, the TTL
+    applies again and the listener is restarted on the next reload. Only one
+    request reloads an expired catalog; the others wait for it. Firestore
+    reads go through `limiter` (an UpstreamLimiter) when one is given.
+    """
+
+    def __init__(self, db, ttl=300, max_size=500, limiter=None):
+        self.db = db
+        self.limiter = limiter
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stories = {}
+        self._listing = []
+        self._loaded_at = None
+        self._watch = None
+        self._listen = False
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def query(self):
+        return classic_stories_query(self.db)
+
+    def _store(self, docs):
+        stories = {}
+        for doc in docs:
+            if len(stories) >= self.max_size:
+                print(f"Warning: story catalog truncated to {self.max_size} stories")
+                break
+            story_data = doc.to_dict()
+            story_data['id'] = doc.id
+            stories[doc.id] = story_data
+        with self._lock:
+            self._stories = stories
+            self._listing = list(stories.values())
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def _watching(self):
+        watch = self._watch
+        if watch is None:
+            return False
+        if watch.is_active:
+            return True
+        # Watch gives up on non-retryable errors; fall back to the TTL
+        print("Warning: story catalog listener stopped, falling back to TTL")
+        self._watch = None
+        return False
+
+    def _is_fresh(self):
+        if self._loaded_at is None:
+            return False
+        if self._watching():
+            return True
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    def _slot(self):
+        return self.limiter.slot() if self.limiter is not None else nullcontext()
+
+    def refresh(self):
+        """Reload the whole catalog from Firestore"""
+        with self._slot(), track_upstream('firestore', 'stream'):
+            docs = list(self.query().stream())
+        self._store(docs)
+        if self._listen and self._watch is None:
+            self.watch()
+
+    def warm(self):
+        """Load the catalog and start listening for changes"""
+        self.refresh()
+        self.watch()
+
+    def watch(self):
+        """Keep the catalog fresh with a Firestore snapshot listener"""
+        self._listen = True
+        if self._watch is not None:
+            return
+
+        def on_snapshot(docs, changes, read_time):
+            self._store(docs)
+
+        try:
+            self._watch = self.query().on_snapshot(on_snapshot)
+        except Exception as e:
+            print(f"Warning: story catalog listener not started, falling back to TTL: {e}")
+
+    def invalidate(self):
+        """Drop cached stories so the next request reloads them"""
+        with self._lock:
+            self._loaded_at = None
+
+    def list_stories(self):
+        """Return all classic stories"""
+        if self._is_fresh():
+            with self._lock:
+                self.hits += 1
+            return self._listing
+
+        with self._lock:
+            self.misses += 1
+        with self._refresh_lock:
+            # Another request may have reloaded the catalog while this one waited
+            if not self._is_fresh():
+                self.refresh()
+        return self._listing
+
+    def get_story(self, story_id):
+        """Return one story by ID, or None if it does not exist"""
+        if self._is_fresh():
+            story_data = self._stories.get(story_id)
+            if story_data is not None:
+                with self._lock:
+                    self.hits += 1
+                return story_data
+
+        # Not in the catalog (expired, or e.g. a generated story) - ask Firestore
+        with self._lock:
+            self.misses += 1
+        with self._slot(), track_upstream('firestore', 'get'):
+            story_doc = self.db.collection('stories').document(story_id).get()
+        if not story_doc.exists:
+            return None
+        story_data = story_doc.to_dict()
+        story_data['id'] = story_id
+        return story_data
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'refreshes': self.refreshes,
+            'size': len(self._stories),
+            'watching': self._watching(),
+        }
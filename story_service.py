@@ -0,0 +1,158 @@
+import os
+import time
+from string import Template
+
+import google.generativeai as genai
+
+from metrics import count_bytes, track_upstream
+
+CHILD_PROMPT = Template("""Write a gentle, soothing bedtime story for children aged 3-8 years old.
+The main character should be a child named ${child_name}.
+The story should include these keywords: ${keywords}.
+
+Requirements:
+- Keep it under 500 words
+- Use simple, comforting language
+- Include a positive message or lesson
+- Make it suitable for bedtime reading
+- Avoid scary or violent content
+- Make ${child_name} the hero of the story
+- Use ${child_name}'s name naturally throughout the story
+
+Please write the story in a warm, narrative style.""")
+
+ADULT_PROMPT = Template("""Write a gentle, therapeutic bedtime story for an adult named ${adult_name} who is struggling with: ${sleep_issue}.
+
+Requirements:
+- Keep it under 600 words
+- Use soothing, calming language
+- Include therapeutic elements that specifically address: ${sleep_issue}
+- Incorporate childhood nostalgia and comfort${memory_text}
+- Make ${adult_name} the central character
+- Include gentle breathing or relaxation cues
+- End with a sense of peace and safety
+- Use warm, comforting imagery
+- Avoid triggering content
+- Make it suitable for falling asleep to
+- Address the specific concerns mentioned in the sleep issue
+
+The story should feel like a loving parent reading to their child, but adapted for an adult's emotional needs.
+Include elements that help the reader feel safe, loved, and ready for sleep.""")
+
+SAFETY_CATEGORIES = [
+    genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+    genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+    genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+    genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+]
+
+
+class StoryService:
+    """Story generation with one long-lived Gemini model per process.
+
+    The model (and the gRPC channel it opens on first use) is created once and
+    shared by every request. Configuration is read and validated when the
+    service is built. Each call reports how long was spent waiting for Gemini,
+    so callers can tell upstream latency apart from their own overhead.
+    """
+
+    def __init__(self, api_key, model_name='gemini-1.5-flash', generation_config=None, safety_settings=None,
+                 model=None):
+        self.model_name = model_name
+        if model is not None:
+            # A stand-in with the same generate_content() interface (see fake_upstreams.py)
+            self.configured = True
+            self.model = model
+        else:
+            self.configured = bool(api_key) and api_key != 'your_gemini_api_key_here'
+            if not self.configured:
+                print("Warning: GEMINI_API_KEY not set. Story generation will not work.")
+            genai.configure(api_key=api_key or 'dummy-key')
+            self.model = genai.GenerativeModel(
+                model_name,
+                generation_config=generation_config,
+                safety_settings=safety_settings
+            )
+
+    @classmethod
+    def from_env(cls):
+        """Build the service from GEMINI_* environment variables"""
+        generation_config = {}
+        for variable, setting, parse in (('GEMINI_TEMPERATURE', 'temperature', float),
+                                         ('GEMINI_MAX_OUTPUT_TOKENS', 'max_output_tokens', int)):
+            value = os.environ.get(variable)
+            if not value:
+                continue
+            try:
+                generation_config[setting] = parse(value)
+            except ValueError:
+                # Warn once here rather than failing every request that needs the model
+                print(f"Warning: invalid {variable} {value!r}; using Gemini's default")
+
+        safety_settings = None
+        threshold = os.environ.get('GEMINI_SAFETY_THRESHOLD')
+        if threshold:
+            try:
+                block = genai.types.HarmBlockThreshold[threshold.strip().upper()]
+            except KeyError:
+                # Warn once here rather than failing every request that needs the model
+                print(f"Warning: unknown GEMINI_SAFETY_THRESHOLD {threshold!r}; using Gemini's default safety "
+                      f"settings. Expected one of {', '.join(genai.types.HarmBlockThreshold.__members__)}")
+            else:
+                safety_settings = {category: block for category in SAFETY_CATEGORIES}
+
+        return cls(
+            os.environ.get('GEMINI_API_KEY'),
+            model_name=os.environ.get('GEMINI_MODEL', 'gemini-1.5-flash'),
+            generation_config=generation_config or None,
+            safety_settings=safety_settings
+        )
+
+    def child_prompt(self, keywords, child_name):
+        """Prompt for a children's story starring child_name"""
+        return CHILD_PROMPT.substitute(child_name=child_name, keywords=', '.join(keywords))
+
+    def adult_prompt(self, adult_name, sleep_issue, memories, custom_memory):
+        """Prompt for a therapeutic grown-ups story"""
+        memory_text = ""
+        if memories:
+            memory_text += f" including these nostalgic elements: {', '.join(memories)}"
+        if custom_memory:
+            memory_text += f" and incorporate this personal memory: '{custom_memory}'"
+        return ADULT_PROMPT.substitute(adult_name=adult_name, sleep_issue=sleep_issue, memory_text=memory_text)
+
+    def generate(self, prompt):
+        """Generate text for prompt; returns (text, timing) with timing['upstream'] in seconds"""
+        start = time.perf_counter()
+        with track_upstream('gemini', 'generate_content'):
+            response = self.model.generate_content(prompt)
+            text = response.text
+        timing = {'upstream': time.perf_counter() - start}
+        count_bytes('gemini', sent=len(prompt.encode('utf-8')), received=len(text.encode('utf-8')))
+        return text, timing
+
+    def stream(self, prompt, timing):
+        """Yield text as Gemini produces it, filling in the timing dict as it goes.
+
+        timing gets 'first_chunk' (seconds until the first text arrived) and
+        'upstream' (seconds spent waiting on Gemini, excluding time the caller
+        spent handling each chunk).
+        """
+        start = time.perf_counter()
+        timing['upstream'] = 0.0
+        received = 0
+        waited_from = start
+        with track_upstream('gemini', 'generate_content_stream') as call:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                text = chunk.text
+                now = time.perf_counter()
+                timing['upstream'] += now - waited_from
+                call['seconds'] = timing['upstream']
+                if text:
+                    timing.setdefault('first_chunk', now - start)
+                    received += len(text.encode('utf-8'))
+                    yield text
+                waited_from = time.perf_counter()
+            timing['upstream'] += time.perf_counter() - waited_from
+            call['seconds'] = timing['upstream']
+        count_bytes('gemini', sent=len(prompt.encode('utf-8')), received=received)
@@ -0,0 +1,197 @@
+import re
+from xml.sax.saxutils import escape
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+SENTENCE_END = re.compile(r'[.!?]+["\'”’)\]]*\s+')
+
+
+def take_sentences(text, limit):
+    """Split off the longest run of whole sentences that fits in `limit` characters.
+
+    Returns (head, rest). A single sentence longer than `limit` is returned on
+    its own; if `text` has no sentence boundary, head is None.
+    """
+    cut = None
+    for match in SENTENCE_END.finditer(text):
+        if match.end() > limit and cut is not None:
+            break
+        cut = match.end()
+        if cut > limit:
+            break
+    if cut is None:
+        return None, text
+    return text[:cut].strip(), text[cut:]
+
+
+class TextSegmenter:
+    """Incrementally split streamed story text into segments for speech synthesis.
+
+    Segments end at paragraph breaks. Paragraphs longer than `max_chars` are
+    split at sentence boundaries, and the first segment is cut after roughly
+    `first_chars` characters so narration can start as early as possible.
+    Text with no sentence boundary to cut at is split between words, and no
+    segment is over `max_bytes` of UTF-8 (Google TTS rejects inputs over 5000).
+    """
+
+    def __init__(self, max_chars=800, first_chars=200, max_bytes=4500):
+        self.max_chars = max_chars
+        self.first_chars = first_chars
+        self.max_bytes = max_bytes
+        self._buffer = ''
+        self._count = 0
+
+    def _limit(self):
+        return self.first_chars if self._count == 0 else self.max_chars
+
+    def _emit(self, segments, text):
+        if not text:
+            return
+        limit = self._limit()
+        if len(text) <= limit and _byte_len(text) <= self.max_bytes:
+            pieces = [text]
+        else:
+            # A run-on paragraph or sentence: bytes are at least characters, so
+            # this keeps every piece within both limits
+            pieces = _split_words(text, min(limit, self.max_bytes))
+        for piece in pieces:
+            segments.append(piece)
+            self._count += 1
+
+    def _split_paragraph(self, segments, paragraph):
+        rest = paragraph.strip()
+        while len(rest) > self._limit():
+            head, rest = take_sentences(rest, self._limit())
+            if head is None:
+                break
+            self._emit(segments, head)
+            rest = rest.strip()
+        self._emit(segments, rest)
+
+    def feed(self, text):
+        """Add streamed text and return any segments that are now complete"""
+        self._buffer += text
+        segments = []
+
+        while True:
+            match = PARAGRAPH_BREAK.search(self._buffer)
+            if not match:
+                break
+            paragraph = self._buffer[:match.start()]
+            self._buffer = self._buffer[match.end():]
+            self._split_paragraph(segments, paragraph)
+
+        # Don't wait for the end of a long paragraph - emit finished sentences
+        while len(self._buffer) > self._limit():
+            head, rest = take_sentences(self._buffer, self._limit())
+            if head is None or not rest.strip():
+                break
+            self._emit(segments, head)
+            self._buffer = rest.lstrip()
+
+        return segments
+
+    def flush(self):
+        """Return whatever text remains once the stream has ended"""
+        segments = []
+        self._split_paragraph(segments, self._buffer)
+        self._buffer = ''
+        return segments
+
+
+def split_sentences(text):
+    """Split text into sentences, keeping their punctuation"""
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    if text[start:].strip():
+        sentences.append(text[start:].strip())
+    return sentences
+
+
+def _byte_len(text):
+    return len(text.encode('utf-8'))
+
+
+def _split_chars(word, max_bytes, encode):
+    # A single word over the limit (e.g. a long URL): cut it between characters
+    pieces = []
+    current = ''
+    size = 0
+    for char in word:
+        char_size = _byte_len(encode(char))
+        if current and size + char_size > max_bytes:
+            pieces.append(current)
+            current, size = '', 0
+        current += char
+        size += char_size
+    pieces.append(current)
+    return pieces
+
+
+def _split_words(sentence, max_bytes, encode=str):
+    # Last resort for a "sentence" with no punctuation that is over the limit.
+    # Sizes are of the encoded text; encode() must work character by character.
+    chunks = []
+    current = ''
+    size = 0
+    for word in sentence.split():
+        word_size = _byte_len(encode(word))
+        if word_size > max_bytes:
+            pieces = _split_chars(word, max_bytes, encode)
+            if current:
+                chunks.append(current)
+            chunks.extend(pieces[:-1])
+            current = pieces[-1]
+            size = _byte_len(encode(current))
+        elif current and size + 1 + word_size > max_bytes:
+            chunks.append(current)
+            current, size = word, word_size
+        else:
+            current = f"{current} {word}" if current else word
+            size += word_size + (1 if size else 0)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_story(text, max_bytes=4500, ssml=False, pause='600ms'):
+    """Pack a whole story into as few TTS inputs as possible, each at most max_bytes of UTF-8.
+
+    Google TTS rejects requests over 5000 bytes of input, so the default
+    leaves some headroom. Sentences are kept whole unless one is over the
+    limit on its own; then it is split between words, and a word that is too
+    long by itself is split between characters. With ssml=True each input is
+    an SSML document with a `pause` break between paragraphs; otherwise
+    paragraphs are separated by blank lines.
+    """
+    if ssml:
+        opening, closing, paragraph_break = '<speak>', '</speak>', f' <break time="{pause}"/> '
+        encode = escape
+    else:
+        opening, closing, paragraph_break = '', '', '\n\n'
+        encode = str
+    limit = max_bytes - _byte_len(opening + closing)
+
+    chunks = []
+    current = ''
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        separator = paragraph_break
+        for sentence in split_sentences(' '.join(paragraph.split())):
+            encoded = encode(sentence)
+            candidate = f"{current}{separator}{encoded}" if current else encoded
+            separator = ' '
+            if _byte_len(candidate) <= limit:
+                current = candidate
+                continue
+            if current:
+                chunks.append(current)
+            if _byte_len(encoded) > limit:
+                pieces = [encode(piece) for piece in _split_words(sentence, limit, encode)]
+                chunks.extend(pieces[:-1])
+                encoded = pieces[-1]
+            current = encoded
+    if current:
+        chunks.append(current)
+    return [f"{opening}{chunk}{closing}" for chunk in chunks]
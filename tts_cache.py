@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+
+def cache_key(text, voice, audio_config, ssml=False):
+    """Content address for a synthesis request: hash of text, voice and audio config.
+
+    SSML input gets its own keys, since the same string reads differently as plain text.
+    """
+    digest = hashlib.sha256()
+    digest.update(text.encode('utf-8'))
+    if ssml:
+        digest.update(b'\0ssml')
+    for message in (voice, audio_config):
+        digest.update(b'\0')
+        digest.update(type(message).to_json(message, sort_keys=True, indent=None).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TTSCache:
+    """On-disk cache of synthesized audio, shared by every worker on the host.
+
+    Files are named by content hash and written atomically, so concurrent
+    workers never see partial audio. File mtimes double as the LRU clock:
+    a hit touches the file, and when the directory grows past `max_bytes`
+    the least recently used files are removed. Other workers write to the
+    same directory, so its size is measured again after every write rather
+    than tracked in memory; the walk is cheap next to the TTS call it follows.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = None  # measured on first use, not at import time
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_written = 0
+        self.evictions = 0
+
+    def path(self, key):
+        """Location of the audio file for `key`"""
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def lookup(self, key):
+        """Return the path of cached audio for `key`, or None on a miss"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def contains(self, key):
+        """Whether audio for `key` is cached, without counting it as a lookup"""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def record_served(self, size):
+        """Count bytes sent to clients from the cache"""
+        with self._lock:
+            self.bytes_served += size
+
+    def put(self, key, audio):
+        """Store audio bytes under `key`, evicting old entries if over budget"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.bytes_written += len(audio)
+            self._trim()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.mp3'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue  # removed by another worker
+                yield os.path.join(root, name), st.st_size, st.st_mtime
+
+    def _trim(self):
+        # Count every worker's files (a rewritten key is only counted once)
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            self._size = total
+            return
+        entries.sort(key=lambda entry: entry[2])
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def _current_size(self):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            return self._size
+
+    def stats(self):
+        """Hit rate and byte counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'bytes_served': self.bytes_served,
+            'bytes_written': self.bytes_written,
+            'evictions': self.evictions,
+            'size_bytes': self._current_size(),
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,67 @@
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+
+class UpstreamBusy(Exception):
+    """Raised when an upstream service already has as many calls in flight as allowed"""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"{upstream} is busy, please retry in {retry_after} seconds")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class UpstreamLimiter:
+    """Caps concurrent calls from this worker to one upstream service.
+
+    A caller waits up to `wait` seconds for a free slot and then gets
+    UpstreamBusy, which the app turns into a 429 with Retry-After. A limit of
+    0 or less disables the cap. The limit and rejections are reported in
+    /metrics under `upstream`, the label track_upstream() uses.
+    """
+
+    def __init__(self, name, limit, wait=2.0, retry_after=5, upstream=None):
+        self.name = name
+        self.limit = limit
+        self.wait = wait
+        self.retry_after = retry_after
+        self.upstream = upstream or name.lower()
+        self._semaphore = threading.BoundedSemaphore(limit) if limit > 0 else None
+        metrics.UPSTREAM_LIMIT.set(max(limit, 0), upstream=self.upstream)
+
+    def acquire(self, wait=None):
+        """Take a slot, waiting up to `wait` seconds (None: the default, -1: forever)"""
+        wait = self.wait if wait is None else wait
+        if self._semaphore is not None:
+            if wait < 0:
+                self._semaphore.acquire()
+            elif not self._semaphore.acquire(timeout=wait):
+                metrics.UPSTREAM_REJECTED.inc(upstream=self.upstream)
+                raise UpstreamBusy(self.name, self.retry_after)
+
+    def release(self):
+        """Give back a slot taken with acquire()"""
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def hold(self, wait=None):
+        """Take a slot and return a function that gives it back (calling it again does nothing)"""
+        self.acquire(wait)
+        released = threading.Lock()
+
+        def release():
+            if released.acquire(blocking=False):
+                self.release()
+
+        return release
+
+    @contextmanager
+    def slot(self, wait=None):
+        """Hold a slot for the duration of a `with` block"""
+        self.acquire(wait)
+        try:
+            yield
+        finally:
+            self.release()